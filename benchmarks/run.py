@@ -0,0 +1,254 @@
+# run.py
+"""Benchmarks for rendering, persistence and admin panel loading.
+
+Run from the repository root:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --suite render insert --compare results.json
+
+Each suite runs against its own database in a temporary directory, so the
+real invoices.db is never touched. Results are written as JSON: one entry per
+metric with its value, unit and whether lower or higher is better. --compare
+prints the change against an earlier results file and exits with status 1 if
+any metric got worse by more than --tolerance. A case that fails or times out is
+listed under "failures" instead of getting a metric, and also makes the exit status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from functions import database
+from .synthetic import make_spec, invoice_rows
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGO_PATH = os.path.join(REPO_ROOT, "images", "logo.png")
+
+SUITES = ('render', 'insert', 'lookup', 'model')
+# Longest wait for one page of the model before the case counts as failed
+MODEL_TIMEOUT_MS = 60000
+DEFAULT_ITEM_COUNTS = (10, 100, 1000, 10000)
+DEFAULT_MODEL_SIZES = (1000, 100000, 1000000)
+
+
+def metric(results, name, value, unit, better='lower'):
+    results[name] = {"value": value, "unit": unit, "better": better}
+
+
+def timed(function, repeat):
+    """Return the median wall time of repeat calls to function."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_render(results, item_counts):
+    from functions.editor import InvoiceGenerator
+
+    def render(spec):
+        InvoiceGenerator(spec["company_info"], spec["client_info"], spec["items"], spec["invoice_info"],
+                         LOGO_PATH).render()
+
+    # The first render builds the template and decodes the logo; measure steady state
+    render(make_spec(0, 1))
+    for count in item_counts:
+        spec = make_spec(count, count)
+        seconds = timed(lambda: render(spec), 5 if count <= 1000 else 2)
+        metric(results, f"render.items_{count}", seconds, "s")
+
+
+def bench_insert(results, single_count, bulk_count):
+    rows = list(invoice_rows(single_count + bulk_count))
+    start = time.perf_counter()
+    for row in rows[:single_count]:
+        database.insert_invoice(*row)
+    elapsed = time.perf_counter() - start
+    metric(results, "insert.single_per_second", single_count / elapsed, "rows/s", "higher")
+
+    start = time.perf_counter()
+    database.insert_invoices_many(rows[single_count:], chunk_size=1000)
+    elapsed = time.perf_counter() - start
+    metric(results, "insert.bulk_per_second", bulk_count / elapsed, "rows/s", "higher")
+
+
+def bench_lookup(results, table_size, samples):
+    database.insert_invoices_many(invoice_rows(table_size), chunk_size=5000)
+    numbers = [row[0] for row in database.get_connection().execute("SELECT invoice_number FROM invoices")]
+    rng = random.Random(1)
+    latencies = []
+    for number in rng.choices(numbers, k=samples):
+        start = time.perf_counter()
+        database.get_invoice_by_number(number)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    metric(results, "lookup.p50", latencies[len(latencies) // 2] * 1e6, "us")
+    metric(results, "lookup.p95", latencies[int(len(latencies) * 0.95)] * 1e6, "us")
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def bench_model(results, sizes, report, failures):
+    from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer, Qt
+    from functions.invoice_model import InvoiceTableModel
+
+    # The model delivers query results through queued signals, which need an application
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(lambda: loop.exit(1))
+    errors = []
+
+    def wait_for_page():
+        # pageLoaded also fires for an empty page; the timer keeps a lost page from hanging the run
+        errors.clear()
+        timer.start(MODEL_TIMEOUT_MS)
+        timed_out = loop.exec_()
+        timer.stop()
+        if timed_out:
+            raise PageTimeout(f"no page within {MODEL_TIMEOUT_MS} ms")
+        if errors:
+            raise PageTimeout(f"query failed: {errors[0]}")
+
+    def make_model(configure):
+        model = InvoiceTableModel()
+        model.pageLoaded.connect(lambda count: loop.quit())
+        model.queryFailed.connect(lambda message: (errors.append(message), loop.quit()))
+        configure(model)
+        return model
+
+    def first_page(model):
+        start = time.perf_counter()
+        model.reload()
+        wait_for_page()
+        return time.perf_counter() - start
+
+    cases = {
+        "newest": lambda model: model.reload(),
+        "by_client": lambda model: model.sort(1, Qt.AscendingOrder),
+        "client_filter": lambda model: model.set_filters({"client_name": "Sara"}),
+    }
+    conn = database.get_connection()
+    for size in sorted(sizes):
+        existing = conn.execute("SELECT COUNT(*) FROM invoices").fetchone()[0]
+        if existing < size:
+            report(f"  growing the invoices table to {size} rows...")
+            database.insert_invoices_many(invoice_rows(size - existing, start=existing), chunk_size=5000)
+        for name, configure in cases.items():
+            case = f"model.first_page.{name}.rows_{size}"
+            try:
+                model = make_model(configure)
+                # Let the page requested on construction or configuration arrive first
+                wait_for_page()
+                metric(results, case, timed(lambda: first_page(model), 5), "s")
+            except PageTimeout as e:
+                report(f"  {case} failed: {e}")
+                failures.append({"metric": case, "error": str(e)})
+    return app
+
+
+def progress(message):
+    print(message, file=sys.stderr)
+
+
+def run(suites, item_counts, model_sizes, report=progress, failures=None):
+    """Run the chosen suites and return the results dict; failed cases are appended to failures."""
+    failures = [] if failures is None else failures
+    benches = {
+        'render': lambda: bench_render(results, item_counts),
+        'insert': lambda: bench_insert(results, 2000, 20000),
+        'lookup': lambda: bench_lookup(results, 50000, 5000),
+        'model': lambda: bench_model(results, model_sizes, report, failures),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            for suite in SUITES:
+                if suite in suites:
+                    report(f"{suite}...")
+                    # Every suite starts from its own empty database
+                    database.set_database_path(os.path.join(directory, f"{suite}.db"))
+                    database.create_table()
+                    benches[suite]()
+        finally:
+            database.close_connections()
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, tolerance, report=progress):
+    """Print each metric against baseline; return the names that regressed beyond tolerance."""
+    regressions = []
+    report(f"{'metric':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or not previous["value"]:
+            report(f"{name:<48} {'-':>12} {current['value']:>12.4g} {'new':>8}")
+            continue
+        change = current["value"] / previous["value"] - 1
+        worse = change > tolerance if current["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append(name)
+        report(f"{name:<48} {previous['value']:>12.4g} {current['value']:>12.4g} {change:>+7.1%}"
+               + (" REGRESSION" if worse else ""))
+    return regressions
+
+
+def parse_sizes(text):
+    return tuple(int(size) for size in text.split(',') if size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark rendering, persistence and admin loading.")
+    parser.add_argument('--suite', nargs='+', choices=SUITES, default=list(SUITES), help="suites to run (default: all)")
+    parser.add_argument('--items', type=parse_sizes, default=DEFAULT_ITEM_COUNTS,
+                        help="comma-separated line item counts to render (default: 10,100,1000,10000)")
+    parser.add_argument('--model-sizes', type=parse_sizes, default=DEFAULT_MODEL_SIZES,
+                        help="comma-separated table sizes for the model suite (default: 1000,100000,1000000)")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="results file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="relative change counted as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    failures = []
+    results = run(args.suite, args.items, args.model_sizes, failures=failures)
+    document = {"environment": environment(), "results": results, "failures": failures}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
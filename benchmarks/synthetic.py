@@ -0,0 +1,66 @@
+# synthetic.py
+"""Deterministic synthetic invoices for the benchmarks."""
+import json
+import random
+
+FIRST_NAMES = ["Ahmed", "Sara", "Bilal", "Ayesha", "Usman", "Fatima", "Zain", "Hina", "Omar", "Noor"]
+LAST_NAMES = ["Khan", "Malik", "Qureshi", "Sheikh", "Butt", "Chaudhry", "Raza", "Siddiqui"]
+ITEM_NAMES = ["Tea", "Cake", "Samosa", "Biryani", "Karahi", "Naan", "Lassi", "Kebab", "Halwa", "Kheer"]
+WORDS = ["fresh", "large", "served", "with", "chutney", "platter", "catering", "for", "guests",
+         "special", "spicy", "mild", "family", "portion", "event", "delivery"]
+VENUES = ["Main Hall", "Garden Lawn", "Rooftop", "Banquet B"]
+
+COMPANY_INFO = {
+    "name": "My Company",
+    "address": "Main Hall",
+    "email": "info@mycompany.com",
+    "phone": "+123456789"
+}
+
+
+def make_items(count, rng):
+    """Return count line items with descriptions long enough to wrap now and then."""
+    return [{
+        "name": rng.choice(ITEM_NAMES),
+        "description": " ".join(rng.choices(WORDS, k=rng.randint(2, 14))),
+        "unit_price": round(rng.uniform(50, 5000), 2),
+        "quantity": rng.randint(1, 20)
+    } for _ in range(count)]
+
+
+def make_client(index, rng):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return {
+        "name": name,
+        "bill_to": name,
+        "email": f"client{index}@example.com",
+        "phone": f"+92300{index % 10000000:07d}"
+    }
+
+
+def make_date(index):
+    """Spread invoices over about three years of dates."""
+    return f"{2022 + index % 3}-{1 + index % 12:02d}-{1 + index % 28:02d}"
+
+
+def make_spec(index, item_count, seed=0):
+    """Return InvoiceGenerator arguments for one synthetic invoice."""
+    rng = random.Random(seed * 1000003 + index)
+    return {
+        "company_info": dict(COMPANY_INFO, address=VENUES[index % len(VENUES)]),
+        "client_info": make_client(index, rng),
+        "items": make_items(item_count, rng),
+        "invoice_info": {"invoice_number": f"BENCH{index:08d}", "date": make_date(index)}
+    }
+
+
+def invoice_rows(count, start=0, items_per_invoice=3, seed=0):
+    """Yield invoices table rows (INVOICE_COLUMNS order) for insert_invoice / insert_invoices_many."""
+    rng = random.Random(seed)
+    for index in range(start, start + count):
+        client = make_client(index, rng)
+        items = make_items(items_per_invoice, rng)
+        total = round(sum(item["unit_price"] * item["quantity"] for item in items), 2)
+        yield (client["name"], client["phone"], client["email"], client["bill_to"], json.dumps(items),
+               f"BENCH{index:08d}", make_date(index), total, f"BENCH{index:08d}.pdf",
+               VENUES[index % len(VENUES)], None)
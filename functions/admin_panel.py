@@ -1,12 +1,118 @@
 # admin_panel.py
 import sys
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QFileDialog, QMessageBox
-from PyQt5.QtCore import Qt
-from functions.database import create_connection
+from PyQt5.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QTableView, QAbstractItemView, QFileDialog, QMessageBox, QTabWidget, QComboBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QProgressDialog
+)
+import threading
+from PyQt5.QtCore import Qt, QRegExp, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QRegExpValidator
+from functions.invoice_model import InvoiceTableModel
+from functions.reports import REPORTS
+from functions.export import export_zip, copy_invoice, ExportCancelled
+
+class ExportSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int, str)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+class ExportWorker(QRunnable):
+    """Copies one invoice, or streams several into a ZIP, on a thread pool thread."""
+    def __init__(self, entries, save_path):
+        super().__init__()
+        self.entries = entries
+        self.save_path = save_path
+        self.signals = ExportSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        try:
+            if len(self.entries) == 1:
+                copy_invoice(self.entries[0][0], self.save_path)
+                count = 1
+            else:
+                count = export_zip(self.entries, self.save_path, self.signals.progress.emit, self._cancel.is_set)
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(count, self.save_path)
+
+class ReportsView(QWidget):
+    """Revenue reports read from the summary tables."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+
+        controls_layout = QHBoxLayout()
+        self.report_combo = QComboBox()
+        self.report_combo.addItems(list(REPORTS))
+        self.report_combo.currentIndexChanged.connect(self.update_placeholders)
+        self.report_combo.currentIndexChanged.connect(self.refresh)
+        range_validator = QRegExpValidator(QRegExp(r'^\d{4}-\d{2}(-\d{2})?$'))
+        self.range_from_input = QLineEdit()
+        self.range_from_input.setPlaceholderText('YYYY-MM')
+        self.range_from_input.setValidator(range_validator)
+        self.range_to_input = QLineEdit()
+        self.range_to_input.setPlaceholderText('YYYY-MM')
+        self.range_to_input.setValidator(range_validator)
+        refresh_button = QPushButton('Refresh')
+        refresh_button.clicked.connect(self.refresh)
+        controls_layout.addWidget(self.report_combo)
+        controls_layout.addWidget(QLabel('From:'))
+        controls_layout.addWidget(self.range_from_input)
+        controls_layout.addWidget(QLabel('to'))
+        controls_layout.addWidget(self.range_to_input)
+        controls_layout.addWidget(refresh_button)
+        layout.addLayout(controls_layout)
+
+        self.report_table = QTableWidget()
+        self.report_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.report_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.report_table)
+        self.setLayout(layout)
+        self.update_placeholders()
+
+    def update_placeholders(self):
+        # Months select whole months in every report; the daily report also takes single days
+        daily = self.report_combo.currentText() == 'Revenue by day'
+        placeholder = 'YYYY-MM[-DD]' if daily else 'YYYY-MM'
+        self.range_from_input.setPlaceholderText(placeholder)
+        self.range_to_input.setPlaceholderText(placeholder)
+
+    def refresh(self):
+        headers, report = REPORTS[self.report_combo.currentText()]
+        range_from = self.range_from_input.text() if self.range_from_input.hasAcceptableInput() else None
+        range_to = self.range_to_input.text() if self.range_to_input.hasAcceptableInput() else None
+        try:
+            rows = report(range_from, range_to)
+        except Exception as e:
+            QMessageBox.critical(self, 'Error', f'An error occurred while loading the report:\n{str(e)}')
+            return
+        self.report_table.clear()
+        self.report_table.setColumnCount(len(headers))
+        self.report_table.setHorizontalHeaderLabels(headers)
+        self.report_table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, value in enumerate(row):
+                text = f'{value:.2f}' if isinstance(value, float) else str(value)
+                self.report_table.setItem(row_index, column, QTableWidgetItem(text))
 
 class AdminPanel(QWidget):
+    # Wait this long after the last keystroke before querying
+    FILTER_DEBOUNCE_MS = 300
+
     def __init__(self):
         super().__init__()
+        # Signals of exports still running in the background
+        self.export_jobs = set()
         self.init_ui()
 
     def init_ui(self):
@@ -14,51 +120,184 @@ class AdminPanel(QWidget):
         self.setGeometry(100, 100, 800, 600)
         
         main_layout = QVBoxLayout()
+        self.tabs = QTabWidget()
+        invoices_tab = QWidget()
+        invoices_layout = QVBoxLayout()
+
+        # Full-text search over clients, emails and line items; overrides the filters while set
+        search_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('Search clients, emails and items')
+        self.search_input.setClearButtonEnabled(True)
+        search_layout.addWidget(QLabel('Search:'))
+        search_layout.addWidget(self.search_input)
+        invoices_layout.addLayout(search_layout)
+
+        # Filter bar
+        filter_layout = QHBoxLayout()
+        self.client_filter_input = QLineEdit()
+        self.client_filter_input.setPlaceholderText('Client name')
+        self.invoice_filter_input = QLineEdit()
+        self.invoice_filter_input.setPlaceholderText('Invoice number prefix')
+
+        date_validator = QRegExpValidator(QRegExp(r'^\d{4}-\d{2}-\d{2}$'))
+        self.date_from_input = QLineEdit()
+        self.date_from_input.setPlaceholderText('YYYY-MM-DD')
+        self.date_from_input.setValidator(date_validator)
+        self.date_to_input = QLineEdit()
+        self.date_to_input.setPlaceholderText('YYYY-MM-DD')
+        self.date_to_input.setValidator(date_validator)
+
+        amount_validator = QRegExpValidator(QRegExp(r'^\d*\.?\d+$'))
+        self.total_min_input = QLineEdit()
+        self.total_min_input.setPlaceholderText('Min')
+        self.total_min_input.setValidator(amount_validator)
+        self.total_max_input = QLineEdit()
+        self.total_max_input.setPlaceholderText('Max')
+        self.total_max_input.setValidator(amount_validator)
 
-        self.invoices_table = QTableWidget()
-        self.invoices_table.setColumnCount(5)
-        self.invoices_table.setHorizontalHeaderLabels(['Invoice Number', 'Client Name', 'Date', 'Total', 'File Path'])
-        main_layout.addWidget(self.invoices_table)
+        filter_layout.addWidget(QLabel('Client:'))
+        filter_layout.addWidget(self.client_filter_input)
+        filter_layout.addWidget(QLabel('Invoice:'))
+        filter_layout.addWidget(self.invoice_filter_input)
+        filter_layout.addWidget(QLabel('Date:'))
+        filter_layout.addWidget(self.date_from_input)
+        filter_layout.addWidget(QLabel('to'))
+        filter_layout.addWidget(self.date_to_input)
+        filter_layout.addWidget(QLabel('Total:'))
+        filter_layout.addWidget(self.total_min_input)
+        filter_layout.addWidget(QLabel('to'))
+        filter_layout.addWidget(self.total_max_input)
+        invoices_layout.addLayout(filter_layout)
 
-        download_button = QPushButton('Download Selected Invoice')
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.FILTER_DEBOUNCE_MS)
+        self.filter_timer.timeout.connect(self.apply_filters)
+        for filter_input in (self.client_filter_input, self.invoice_filter_input, self.date_from_input,
+                             self.date_to_input, self.total_min_input, self.total_max_input):
+            filter_input.textChanged.connect(self.filter_timer.start)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.FILTER_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        self.invoices_model = InvoiceTableModel(self)
+        self.invoices_model.queryFailed.connect(self.show_query_error)
+        self.invoices_table = QTableView()
+        self.invoices_table.setModel(self.invoices_model)
+        self.invoices_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.invoices_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.invoices_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # Start in the model's default order (newest first) rather than by the first column
+        self.invoices_table.horizontalHeader().setSortIndicator(-1, Qt.DescendingOrder)
+        self.invoices_table.setSortingEnabled(True)
+        invoices_layout.addWidget(self.invoices_table)
+
+        download_button = QPushButton('Download Selected Invoices')
         download_button.clicked.connect(self.download_invoice)
-        main_layout.addWidget(download_button)
+        invoices_layout.addWidget(download_button)
+
+        invoices_tab.setLayout(invoices_layout)
+        self.tabs.addTab(invoices_tab, 'Invoices')
+
+        self.reports_view = ReportsView()
+        self.tabs.addTab(self.reports_view, 'Reports')
+        # Reports are cheap to query, so they are refreshed every time the tab is opened
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        main_layout.addWidget(self.tabs)
 
         self.setLayout(main_layout)
         self.load_invoices()
 
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.reports_view:
+            self.reports_view.refresh()
+
     def load_invoices(self):
-        conn = create_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT invoice_number, client_name, date, total, file_path FROM invoices")
-        rows = cur.fetchall()
-        
-        self.invoices_table.setRowCount(len(rows))
-        for row_idx, row in enumerate(rows):
-            for col_idx, data in enumerate(row):
-                self.invoices_table.setItem(row_idx, col_idx, QTableWidgetItem(str(data)))
+        self.invoices_model.reload()
+
+    def refresh(self):
+        """Bring the panel up to date when it is shown again: only new invoices are queried."""
+        self.invoices_model.refresh()
+        if self.tabs.currentWidget() is self.reports_view:
+            self.reports_view.refresh()
+
+    def current_filters(self):
+        """Return the filter bar contents as query_invoices filters."""
+        def amount(line_edit):
+            return float(line_edit.text()) if line_edit.hasAcceptableInput() else None
+
+        def date(line_edit):
+            return line_edit.text() if line_edit.hasAcceptableInput() else None
+
+        return {
+            'client_name': self.client_filter_input.text().strip(),
+            'invoice_prefix': self.invoice_filter_input.text().strip(),
+            'date_from': date(self.date_from_input),
+            'date_to': date(self.date_to_input),
+            'total_min': amount(self.total_min_input),
+            'total_max': amount(self.total_max_input),
+        }
+
+    def apply_filters(self):
+        self.invoices_model.set_filters(self.current_filters())
+
+    def apply_search(self):
+        self.invoices_model.set_search(self.search_input.text())
+
+    def show_query_error(self, message):
+        QMessageBox.critical(self, 'Error', f'An error occurred while loading invoices:\n{message}')
 
     def download_invoice(self):
-        selected_row = self.invoices_table.currentRow()
-        if selected_row < 0:
+        rows = sorted(index.row() for index in self.invoices_table.selectionModel().selectedRows())
+        if not rows:
             QMessageBox.warning(self, 'Selection Error', 'Please select an invoice to download.')
             return
 
-        file_path = self.invoices_table.item(selected_row, 4).text()
-        if not file_path:
-            QMessageBox.warning(self, 'File Error', 'Selected invoice file path is invalid.')
+        entries = []
+        for row in rows:
+            file_path = self.invoices_model.file_path(row)
+            if not file_path:
+                QMessageBox.warning(self, 'File Error', 'Selected invoice file path is invalid.')
+                return
+            entries.append((file_path, f'{self.invoices_model.invoice_number(row)}.pdf'))
+
+        if len(entries) == 1:
+            save_path, _ = QFileDialog.getSaveFileName(self, 'Save Invoice PDF', entries[0][1], 'PDF Files (*.pdf)')
+        else:
+            save_path, _ = QFileDialog.getSaveFileName(self, 'Save Invoices', 'invoices.zip', 'ZIP Archives (*.zip)')
+        if not save_path:
             return
 
-        save_path, _ = QFileDialog.getSaveFileName(self, 'Save Invoice PDF', 'invoice.pdf', 'PDF Files (*.pdf)')
-        if save_path:
-            try:
-                with open(file_path, 'rb') as file:
-                    content = file.read()
-                with open(save_path, 'wb') as file:
-                    file.write(content)
-                QMessageBox.information(self, 'Download Success', f'Invoice downloaded successfully to:\n{save_path}')
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', f'An error occurred while downloading the invoice:\n{str(e)}')
+        # Copying runs on the thread pool; the dialog only reports progress and offers Cancel
+        worker = ExportWorker(entries, save_path)
+        progress_dialog = QProgressDialog('Exporting invoices...', 'Cancel', 0, len(entries), self)
+        progress_dialog.setWindowTitle('Download')
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        progress_dialog.canceled.connect(worker.cancel)
+        signals = worker.signals
+        signals.progress.connect(lambda done, total: progress_dialog.setValue(done))
+        signals.finished.connect(lambda count, path: self.export_finished(signals, progress_dialog, count, path))
+        signals.failed.connect(lambda message: self.export_failed(signals, progress_dialog, message))
+        signals.cancelled.connect(lambda: self.export_done(signals, progress_dialog))
+        self.export_jobs.add(signals)
+        QThreadPool.globalInstance().start(worker)
+
+    def export_done(self, signals, progress_dialog):
+        self.export_jobs.discard(signals)
+        progress_dialog.reset()
+
+    def export_finished(self, signals, progress_dialog, count, save_path):
+        self.export_done(signals, progress_dialog)
+        noun = 'Invoice' if count == 1 else f'{count} invoices'
+        QMessageBox.information(self, 'Download Success', f'{noun} downloaded successfully to:\n{save_path}')
+
+    def export_failed(self, signals, progress_dialog, message):
+        self.export_done(signals, progress_dialog)
+        QMessageBox.critical(self, 'Error', f'An error occurred while downloading the invoice:\n{message}')
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,243 @@
+# assets.py
+"""Image assets prepared for embedding in invoices.
+
+Source images such as images/logo.png (an interlaced 6719 px PNG, which fpdf cannot read)
+are turned on demand into variants it can embed: de-interlaced 8-bit PNGs and JPEGs,
+resampled to the resolution the image is drawn at. Variants are cached on disk under
+ASSET_CACHE, named after the source's content hash, so replacing a logo gives new
+variants with nothing to rerun; the hash of a file is only computed again when its
+modification time or size changes.
+
+Build the variants of a source ahead of time with
+
+    python -m functions.assets images/logo.png --dpi 72 150 300
+
+A source that fpdf can read directly (a non-interlaced 8-bit PNG) is embedded as it is
+whenever it is smaller than its variants. Pillow is needed to make variants; without it
+the variants already in the cache are still used, and anything else raises AssetError.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+
+from .template import LOGO_WIDTH
+
+ASSET_CACHE = 'asset_cache'
+LOGO_SOURCE = os.path.join('images', 'logo.png')
+DEFAULT_DPIS = (72, 150, 300)
+JPEG_QUALITY = 90
+# Invoices are printed on white, so transparency can be flattened onto it
+WHITE = (255, 255, 255)
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+class AssetError(RuntimeError):
+    """No embeddable version of an image is available."""
+
+class AssetPipeline:
+    """Makes and caches size and format variants of source images.
+
+    The cache directory holds the variants as <hash>-<width>px.<ext> next to an index of
+    source path -> (mtime, size, hash), so an unchanged source is not read again.
+    """
+    def __init__(self, cache_dir=ASSET_CACHE):
+        self.cache_dir = cache_dir
+        self._index = None
+        # Resolved best variants, by source version, size, resolution and background
+        self._best = {}
+        self._lock = threading.Lock()
+
+    def source_hash(self, path):
+        """Return the sha256 of a source file, cached by path, modification time and size."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                return entry[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        with self._lock:
+            self._index[key] = (stat.st_mtime_ns, stat.st_size, digest)
+            self._save_index()
+        return digest
+
+    def variant(self, path, width, format='PNG', background=None):
+        """Return the path of path resampled to width pixels, made once and then read from the cache.
+
+        format is 'PNG' or 'JPEG'; a JPEG has any transparency flattened onto background.
+        The image is never scaled up.
+        """
+        from PIL import Image
+
+        ext = 'jpg' if format == 'JPEG' else 'png'
+        with Image.open(path) as image:
+            width = min(width, image.width)
+            target = os.path.join(self.cache_dir, f'{self.source_hash(path)[:32]}-{width}px.{ext}')
+            if os.path.exists(target):
+                return target
+            image.load()
+            if image.width != width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+            image = _embeddable(image, format, background)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+        if format == 'JPEG':
+            image.save(temp_path, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+        else:
+            image.save(temp_path, format='PNG', optimize=True)
+        os.replace(temp_path, target)
+        return target
+
+    def variants(self, path, width_mm, dpi=None, background=None):
+        """Return the variants of path suitable for drawing it width_mm wide at dpi (None: full size).
+
+        Always a de-interlaced PNG. Photographic images (more than 256 colours) also get a
+        JPEG if they are opaque or background says what to flatten them onto; line art
+        like a logo keeps to PNG, where JPEG would blur its edges.
+        """
+        from PIL import Image
+
+        width = _pixels(width_mm, dpi) if dpi else sys.maxsize
+        png = self.variant(path, width, 'PNG')
+        candidates = [png]
+        # Judge the resampled image rather than a source that may be many megapixels
+        with Image.open(png) as image:
+            opaque = not _has_alpha(image)
+            photo = _colours(image) > 256
+        if photo and (opaque or background is not None):
+            candidates.append(self.variant(path, width, 'JPEG', background))
+        return candidates
+
+    def best_variant(self, path, width_mm, dpi=None, background=None):
+        """Return the smallest suitable variant of path.
+
+        A source fpdf can embed as it is (see _embeddable_png) is a candidate too, so a
+        variant never replaces a smaller original. Without Pillow, the variants come from
+        cached_variant(); raises AssetError when there is nothing fpdf can embed.
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, width_mm, dpi, background)
+        best = self._best.get(key)
+        if best is None:
+            try:
+                candidates = self.variants(path, width_mm, dpi, background)
+            except ImportError:
+                cached = self.cached_variant(path, width_mm, dpi)
+                candidates = [cached] if cached else []
+            if _embeddable_png(path):
+                candidates.append(path)
+            if not candidates:
+                raise AssetError(f"Pillow is needed to prepare {path} for embedding and no variant of it "
+                                 f"is cached in {self.cache_dir}; install Pillow or copy the cache "
+                                 f"built with 'python -m functions.assets'")
+            best = self._best[key] = min(candidates, key=os.path.getsize)
+        return best
+
+    def cached_variant(self, path, width_mm, dpi=None):
+        """Return the best variant of path already in the cache, without Pillow; None if there is none.
+
+        Takes the narrowest variant at least as wide as dpi asks for, or else the widest
+        one (the source may be narrower than that); at equal width, the smaller file.
+        """
+        prefix = self.source_hash(path)[:32]
+        widths = {}
+        for variant in glob.glob(os.path.join(glob.escape(self.cache_dir), f'{prefix}-*px.*')):
+            match = re.fullmatch(r'[0-9a-f]+-(\d+)px\.(png|jpg)', os.path.basename(variant))
+            if match:
+                widths.setdefault(int(match.group(1)), []).append(variant)
+        if not widths:
+            return None
+        wanted = _pixels(width_mm, dpi) if dpi else sys.maxsize
+        wide_enough = [width for width in widths if width >= wanted]
+        width = min(wide_enough) if wide_enough else max(widths)
+        return min(widths[width], key=os.path.getsize)
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(os.path.join(self.cache_dir, 'index.json'), encoding='utf-8') as f:
+                    self._index = {path: tuple(entry) for path, entry in json.load(f).items()}
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path = os.path.join(self.cache_dir, 'index.json')
+        temp_path = f'{index_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(temp_path, index_path)
+
+def _pixels(width_mm, dpi):
+    return max(1, round(width_mm / 25.4 * dpi))
+
+def _embeddable_png(path):
+    """True if path is a PNG fpdf reads as it is: 8-bit and not interlaced (from the IHDR chunk)."""
+    with open(path, 'rb') as f:
+        header = f.read(29)
+    return (len(header) == 29 and header[:8] == PNG_SIGNATURE and header[12:16] == b'IHDR'
+            and header[24] == 8 and header[28] == 0)
+
+def _has_alpha(image):
+    if image.mode in ('RGBA', 'LA'):
+        return image.getchannel('A').getextrema()[0] < 255
+    return 'transparency' in image.info
+
+def _colours(image, limit=257):
+    colours = image.convert('RGB').getcolors(limit)
+    return limit if colours is None else len(colours)
+
+def _embeddable(image, format, background):
+    """Convert an image to 8-bit modes fpdf can embed; grey images become single-channel."""
+    from PIL import Image, ImageChops
+
+    if image.mode not in ('L', 'LA', 'RGB', 'RGBA'):
+        image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+    if format == 'JPEG' and image.mode in ('LA', 'RGBA'):
+        flat = Image.new('RGB', image.size, background or WHITE)
+        flat.paste(image, mask=image.getchannel('A'))
+        image = flat
+    if image.mode in ('RGB', 'RGBA'):
+        red, green, blue = image.getchannel('R'), image.getchannel('G'), image.getchannel('B')
+        if not ImageChops.difference(red, green).getbbox() and not ImageChops.difference(red, blue).getbbox():
+            image = image.convert('LA' if image.mode == 'RGBA' else 'L')
+    return image
+
+assets = AssetPipeline()
+
+def logo_variant(path, dpi=None):
+    """Return the smallest embeddable variant of a logo for the size the template draws it at."""
+    return assets.best_variant(path, LOGO_WIDTH, dpi, WHITE)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the embeddable variants of source images.")
+    parser.add_argument('sources', nargs='*', default=[LOGO_SOURCE], help=f"source images (default: {LOGO_SOURCE})")
+    parser.add_argument('--dpi', type=int, nargs='+', default=DEFAULT_DPIS,
+                        help="resolutions to build (default: 72 150 300)")
+    parser.add_argument('--width-mm', type=float, default=LOGO_WIDTH,
+                        help=f"width the image is drawn at, in mm (default: {LOGO_WIDTH})")
+    parser.add_argument('--cache', default=ASSET_CACHE, help=f"cache directory (default: {ASSET_CACHE})")
+    args = parser.parse_args(argv)
+
+    pipeline = AssetPipeline(args.cache)
+    for source in args.sources:
+        for dpi in args.dpi:
+            candidates = pipeline.variants(source, args.width_mm, dpi, WHITE)
+            best = min(candidates, key=os.path.getsize)
+            sizes = ', '.join(f"{os.path.basename(c)} {os.path.getsize(c)} bytes" for c in candidates)
+            print(f"{source} @ {dpi} dpi: {sizes}; best {os.path.basename(best)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,293 @@
+# batch.py
+"""Headless batch rendering of invoices.
+
+Reads invoice specs from a JSON Lines or CSV file and renders them with
+InvoiceGenerator across a pool of worker processes:
+
+    python -m functions.batch invoices.jsonl --workers 4 --store invoice_store
+
+PDFs go into the content-addressed PdfStore; --output-dir additionally writes
+a copy named after each invoice number. --profile prints the time spent in
+each render stage and the database, and --cprofile DIR saves a cProfile
+capture of every invoice. --output-profile picks archive, email or draft
+output (see functions.output_profiles); the report gives the bytes written.
+
+A JSON Lines spec holds the InvoiceGenerator arguments:
+
+    {"company_info": {...}, "client_info": {...}, "items": [...],
+     "invoice_info": {"invoice_number": "INV1", "date": "2024-06-21"}}
+
+Specs without an invoice_number are numbered from the invoice_sequence
+table as they are submitted.
+
+A CSV file has one line item per row; consecutive rows with the same
+invoice_number make up one invoice. Columns: invoice_number, date, venue,
+client_name, client_phone, client_email, bill_to, item_name,
+item_description, unit_price, quantity.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from .assets import LOGO_SOURCE
+from .database import create_table, insert_invoices_many, InvoiceNumberAllocator, CONFLICT_POLICIES, INVOICE_COLUMNS
+from .editor import InvoiceGenerator
+from .line_items import LineItemBatch
+from .instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from .output_profiles import PROFILES, DEFAULT_PROFILE
+from .storage import PdfStore, STORE_ROOT
+
+DEFAULT_LOGO_PATH = LOGO_SOURCE
+DEFAULT_COMPANY_INFO = {
+    "name": "My Company",
+    "address": "",
+    "email": "info@mycompany.com",
+    "phone": "+123456789"
+}
+
+
+class InvalidSpec:
+    """Stands in for a spec that could not be parsed, so run_batch reports it and goes on."""
+    def __init__(self, label, error):
+        self.label = label
+        self.error = error
+
+
+def read_jsonl_specs(path):
+    """Yield invoice specs from a JSON Lines file; unparsable lines yield an InvalidSpec."""
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spec = json.loads(line)
+            except ValueError as e:
+                yield InvalidSpec(f"line {number}", f"{type(e).__name__}: {e}")
+                continue
+            if isinstance(spec, dict):
+                yield spec
+            else:
+                yield InvalidSpec(f"line {number}", "expected a JSON object")
+
+
+def spec_from_csv_rows(rows):
+    """Build an invoice spec from the CSV rows of a single invoice."""
+    first = rows[0]
+    company_info = dict(DEFAULT_COMPANY_INFO, address=first.get("venue", ""))
+    client_info = {
+        "name": first["client_name"],
+        "bill_to": first.get("bill_to") or first["client_name"],
+        "email": first.get("client_email", ""),
+        "phone": first.get("client_phone", "")
+    }
+    items = LineItemBatch()
+    for row in rows:
+        items.append(row["item_name"], row.get("item_description", ""), row["unit_price"], row["quantity"])
+    invoice_info = {
+        "invoice_number": first["invoice_number"],
+        "date": first["date"]
+    }
+    return {"company_info": company_info, "client_info": client_info,
+            "items": items, "invoice_info": invoice_info}
+
+
+def read_csv_specs(path):
+    """Yield invoice specs from a CSV file with one line item per row; bad rows yield an InvalidSpec."""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for invoice_number, rows in itertools.groupby(reader, key=lambda row: row.get("invoice_number")):
+            try:
+                yield spec_from_csv_rows(list(rows))
+            except (KeyError, ValueError, TypeError) as e:
+                yield InvalidSpec(invoice_number or "?", f"{type(e).__name__}: {e}")
+
+
+def read_specs(path):
+    """Yield invoice specs from a .csv or JSON Lines file."""
+    if path.lower().endswith('.csv'):
+        return read_csv_specs(path)
+    return read_jsonl_specs(path)
+
+
+def render_spec(spec, store_root, output_dir=None, profile=False, cprofile_dir=None, output_profile=None):
+    """Render one invoice spec into the store (and output_dir if given). Runs in a worker process.
+
+    With profile the result carries the stage timings; with cprofile_dir a cProfile
+    capture of the render is saved there as <invoice_number>.prof. output_profile is
+    the name of an output profile, the default one if None.
+    """
+    invoice_number = spec.get("invoice_info", {}).get("invoice_number", "?")
+    start = time.perf_counter()
+    instrumentation = NULL_INSTRUMENTATION
+    if profile or cprofile_dir:
+        instrumentation = Instrumentation(profile=bool(cprofile_dir))
+    try:
+        generator = InvoiceGenerator(spec.get("company_info", DEFAULT_COMPANY_INFO), spec["client_info"],
+                                     spec["items"], spec["invoice_info"],
+                                     spec.get("logo_path", DEFAULT_LOGO_PATH), instrumentation=instrumentation,
+                                     output_profile=output_profile)
+        record = generator.invoice_record(store=PdfStore(store_root))
+        file_path = record[INVOICE_COLUMNS.index('file_path')]
+        if output_dir:
+            generator.save_pdf(os.path.join(output_dir, f"{invoice_number}.pdf"))
+        if cprofile_dir:
+            instrumentation.dump_profile(os.path.join(cprofile_dir, f"{invoice_number}.prof"))
+        return {"invoice_number": invoice_number, "ok": True, "file_path": file_path, "record": record,
+                "bytes": len(generator.render()), "seconds": time.perf_counter() - start,
+                "metrics": instrumentation.summary() if instrumentation.enabled else None}
+    except Exception as e:
+        return {"invoice_number": invoice_number, "ok": False, "error": f"{type(e).__name__}: {e}",
+                "seconds": time.perf_counter() - start}
+
+
+def run_batch(specs, store_root=STORE_ROOT, output_dir=None, workers=None, flush_size=100, on_conflict='skip',
+              report=print, number_prefix='INV', profile=False, cprofile_dir=None, output_profile=None):
+    """Render specs across a process pool into the PDF store and bulk insert the resulting rows.
+
+    on_conflict is passed to insert_invoices_many for invoice numbers already in the database.
+    Specs without an invoice number get one with number_prefix, reserved flush_size at a time.
+    profile adds a per-stage timing table to the report and a 'metrics' entry to the summary;
+    cprofile_dir and output_profile are passed on to render_spec.
+
+    At most a few invoices per worker are in flight at a time, so specs are
+    consumed as a stream. A spec that cannot be parsed (an InvalidSpec) counts as a
+    failed invoice; rows already rendered are saved even if the run stops early.
+    Returns a summary dict with counts and throughput.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if cprofile_dir:
+        os.makedirs(cprofile_dir, exist_ok=True)
+    # Totals of the stage timings reported by the workers, plus the database flushes
+    metrics = Instrumentation() if profile else NULL_INSTRUMENTATION
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    specs = iter(specs)
+    invoice_numbers = InvoiceNumberAllocator(number_prefix, block_size=flush_size)
+    pending_rows = []
+    rendered = failed = 0
+    bytes_written = 0
+    saved = {'inserted': 0, 'replaced': 0, 'skipped': 0}
+    start = time.perf_counter()
+
+    def flush():
+        if pending_rows:
+            with metrics.span('database'):
+                counts = insert_invoices_many(pending_rows, on_conflict=on_conflict, chunk_size=flush_size)
+            for key, value in counts.items():
+                saved[key] += value
+            pending_rows.clear()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    try:
+                        spec = next(specs, None)
+                    except (OSError, csv.Error, UnicodeDecodeError) as e:
+                        # The reader itself broke; nothing after this point can be read
+                        failed += 1
+                        report(f"FAILED reading specs: {type(e).__name__}: {e}")
+                        exhausted = True
+                        continue
+                    if spec is None:
+                        exhausted = True
+                    elif isinstance(spec, InvalidSpec):
+                        failed += 1
+                        report(f"FAILED {spec.label}: {spec.error}")
+                    elif not isinstance(spec, dict) or not isinstance(spec.get("invoice_info", {}), dict):
+                        failed += 1
+                        report("FAILED ?: a spec must be a dict with a dict invoice_info")
+                    else:
+                        invoice_info = spec.setdefault("invoice_info", {})
+                        if not invoice_info.get("invoice_number"):
+                            invoice_info["invoice_number"] = invoice_numbers.next()
+                        in_flight.add(executor.submit(render_spec, spec, store_root, output_dir, profile,
+                                                      cprofile_dir, output_profile))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result["ok"]:
+                        rendered += 1
+                        bytes_written += result["bytes"]
+                        pending_rows.append(result["record"])
+                        # Workers also report metrics for --cprofile alone; only --profile totals them
+                        if profile and result["metrics"]:
+                            metrics.merge(result["metrics"])
+                        report(f"OK     {result['invoice_number']} -> {result['file_path']} "
+                               f"({result['seconds']:.3f}s)")
+                    else:
+                        failed += 1
+                        report(f"FAILED {result['invoice_number']}: {result['error']}")
+                if len(pending_rows) >= flush_size:
+                    flush()
+    finally:
+        # Invoices already rendered are in the store; get them into the database as well
+        flush()
+        invoice_numbers.release()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rendered": rendered,
+        "failed": failed,
+        **saved,
+        "output_profile": output_profile or DEFAULT_PROFILE,
+        "bytes": bytes_written,
+        "seconds": elapsed,
+        "invoices_per_second": rendered / elapsed if elapsed else 0.0
+    }
+    report(f"Rendered {rendered} invoices ({failed} failed; {saved['inserted']} inserted, "
+           f"{saved['replaced']} replaced, {saved['skipped']} skipped in the database) "
+           f"in {elapsed:.2f}s - {summary['invoices_per_second']:.1f} invoices/s")
+    report(f"Output profile {summary['output_profile']}: {bytes_written} bytes, "
+           f"{bytes_written / max(rendered, 1):.0f} bytes/invoice")
+    if profile:
+        summary["metrics"] = metrics.summary()
+        report_metrics(metrics, rendered, report)
+    return summary
+
+
+def report_metrics(metrics, rendered, report=print):
+    """Print the stage timing totals and counters of a profiled batch."""
+    total = sum(metrics.spans.values()) or 1.0
+    report(f"{'stage':<12} {'total s':>10} {'ms/invoice':>11} {'share':>7}")
+    for name, seconds in sorted(metrics.spans.items(), key=lambda entry: -entry[1]):
+        report(f"{name:<12} {seconds:>10.3f} {seconds * 1000 / max(rendered, 1):>11.2f} {seconds / total:>7.1%}")
+    for name, value in metrics.counters.items():
+        report(f"{name:<12} {value:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render invoices in batch from a JSON Lines or CSV file.")
+    parser.add_argument('specs', help="path to a .jsonl or .csv file of invoice specs")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument('--store', default=STORE_ROOT, help=f"root of the PDF store (default: {STORE_ROOT})")
+    parser.add_argument('--output-dir', default=None, help="also write a copy of each PDF to this directory")
+    parser.add_argument('--on-conflict', choices=CONFLICT_POLICIES, default='skip',
+                        help="what to do with invoice numbers already in the database (default: skip)")
+    parser.add_argument('--profile', action='store_true', help="report the time spent in each render stage")
+    parser.add_argument('--cprofile', metavar='DIR', help="save a cProfile capture of every invoice to DIR")
+    parser.add_argument('--number-prefix', default='INV', help="prefix of generated invoice numbers (default: INV)")
+    parser.add_argument('--output-profile', choices=PROFILES, default=DEFAULT_PROFILE,
+                        help=f"PDF compression, fonts and logo resolution (default: {DEFAULT_PROFILE})")
+    args = parser.parse_args(argv)
+
+    create_table()
+    summary = run_batch(read_specs(args.specs), store_root=args.store, output_dir=args.output_dir, workers=args.workers,
+                        on_conflict=args.on_conflict, number_prefix=args.number_prefix,
+                        profile=args.profile, cprofile_dir=args.cprofile, output_profile=args.output_profile)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
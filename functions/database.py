@@ -1,78 +1,728 @@
 # database.py
+import atexit
+import itertools
+import json
+import os
 import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from collections.abc import Mapping
 from sqlite3 import Error
+from .money import to_minor, line_total
+from .line_items import items_to_json
+
+DB_PATH = 'invoices.db'
+
+# Applied to every connection when it is opened
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+INVOICE_COLUMNS = ('client_name', 'client_phone', 'client_email', 'bill_to', 'items',
+                   'invoice_number', 'date', 'total', 'file_path', 'venue', 'content_hash', 'total_minor')
+
+ITEMS_INDEX = INVOICE_COLUMNS.index('items')
+TOTAL_INDEX = INVOICE_COLUMNS.index('total')
+
+CONFLICT_POLICIES = ('skip', 'replace', 'fail')
+
+SQL_CREATE_INVOICE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_invoices_date ON invoices(date)",
+    "CREATE INDEX IF NOT EXISTS idx_invoices_client_name ON invoices(client_name COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS idx_invoices_total ON invoices(total)",
+)
+
+# Sort keys accepted by query_invoices, mapped to the expression the matching index is built on
+SORT_EXPRESSIONS = {
+    'id': 'id',
+    'invoice_number': 'invoice_number',
+    'client_name': 'client_name COLLATE NOCASE',
+    'date': 'date',
+    'total': 'total',
+}
+
+SQL_CREATE_INVOICE_SEQUENCE_TABLE = """CREATE TABLE IF NOT EXISTS invoice_sequence (
+                                            prefix TEXT PRIMARY KEY,
+                                            next_value INTEGER NOT NULL
+                                        );"""
+
+INVOICE_NUMBER_WIDTH = 6
+
+# Exact total of an invoices row in paisa, for rows written without total_minor
+SQL_ROW_TOTAL_MINOR = "COALESCE({row}.total_minor, CAST(round({row}.total * 100) AS INTEGER), 0)"
+
+# Revenue summaries kept up to date by triggers on invoices: table -> (key columns, key
+# expressions over an invoices row, with {row} standing for NEW, OLD or invoices)
+SUMMARY_TABLES = {
+    'revenue_by_client_month': (('client_name', 'month'),
+                                ("{row}.client_name", "COALESCE(substr({row}.date, 1, 7), '')")),
+    'revenue_by_day': (('day',), ("COALESCE(substr({row}.date, 1, 10), '')",)),
+    'revenue_by_venue_month': (('venue', 'month'),
+                               ("COALESCE({row}.venue, '')", "COALESCE(substr({row}.date, 1, 7), '')")),
+}
+
+SQL_CREATE_INVOICES_FTS_TABLE = """CREATE VIRTUAL TABLE IF NOT EXISTS invoices_fts USING fts5(
+                                       client_name, client_email, bill_to, items,
+                                       prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+                                   )"""
+
+# Line item names and descriptions of an invoices row as one searchable text
+SQL_FTS_ITEMS_TEXT = """CASE WHEN json_valid({row}.items) THEN
+                            (SELECT group_concat(COALESCE(json_extract(value, '$.name'), '') || ' ' ||
+                                                 COALESCE(json_extract(value, '$.description'), ''), ' ')
+                             FROM json_each({row}.items))
+                        END"""
+
+SQL_CREATE_INVOICES_FTS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS invoices_fts_insert AFTER INSERT ON invoices BEGIN
+            INSERT INTO invoices_fts(rowid, client_name, client_email, bill_to, items)
+            VALUES(NEW.id, NEW.client_name, NEW.client_email, NEW.bill_to, {SQL_FTS_ITEMS_TEXT.format(row='NEW')});
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS invoices_fts_delete AFTER DELETE ON invoices BEGIN
+           DELETE FROM invoices_fts WHERE rowid = OLD.id;
+       END""",
+    f"""CREATE TRIGGER IF NOT EXISTS invoices_fts_update AFTER UPDATE OF client_name, client_email, bill_to, items ON invoices BEGIN
+            UPDATE invoices_fts SET client_name = NEW.client_name, client_email = NEW.client_email, bill_to = NEW.bill_to,
+                                    items = {SQL_FTS_ITEMS_TEXT.format(row='NEW')}
+            WHERE rowid = NEW.id;
+        END""",
+)
+
+# bm25 weights of the invoices_fts columns: a hit on the client name ranks highest
+SEARCH_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+SQL_CREATE_INVOICE_ITEMS_TABLE = """CREATE TABLE IF NOT EXISTS invoice_items (
+                                        id INTEGER PRIMARY KEY,
+                                        invoice_id INTEGER NOT NULL REFERENCES invoices(id) ON DELETE CASCADE,
+                                        position INTEGER NOT NULL,
+                                        name TEXT NOT NULL,
+                                        description TEXT,
+                                        unit_price REAL,
+                                        quantity INTEGER,
+                                        total REAL,
+                                        unit_price_minor INTEGER,
+                                        total_minor INTEGER
+                                    );"""
+
+SQL_CREATE_INVOICE_ITEMS_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice_id ON invoice_items(invoice_id)",
+    "CREATE INDEX IF NOT EXISTS idx_invoice_items_name ON invoice_items(name)",
+)
+
+# Expands the JSON items column of the selected invoices into invoice_items rows. Invoices
+# that already have rows are left alone, so re-running it (or a skipped insert) is harmless.
+# Amounts in paisa come from the money functions the renderer uses (see _register_functions);
+# the REAL columns are derived from them for existing readers.
+SQL_INSERT_INVOICE_ITEMS = """INSERT INTO invoice_items(invoice_id, position, name, description, unit_price, quantity,
+                                                        unit_price_minor, total_minor, total)
+                              SELECT invoice_id, position, name, description, unit_price, quantity,
+                                     unit_price_minor, total_minor, total_minor / 100.0
+                              FROM (SELECT invoice_id, position, name, description, unit_price, quantity, unit_price_minor,
+                                           money_line_total(unit_price_minor, quantity) AS total_minor
+                                    FROM (SELECT i.id AS invoice_id, j.key AS position, json_extract(j.value, '$.name') AS name,
+                                                 json_extract(j.value, '$.description') AS description,
+                                                 json_extract(j.value, '$.unit_price') AS unit_price,
+                                                 json_extract(j.value, '$.quantity') AS quantity,
+                                                 money_to_minor(json_extract(j.value, '$.unit_price')) AS unit_price_minor
+                                          FROM invoices i, json_each(i.items) j
+                                          WHERE {where} AND json_valid(i.items)
+                                            AND NOT EXISTS (SELECT 1 FROM invoice_items t WHERE t.invoice_id = i.id)))"""
+
+_local = threading.local()
+# Open connections of this process, so close_connections can reach every thread's
+_connections = set()
+_connections_lock = threading.Lock()
+# Connections of exited threads, waiting to be closed
+_retired = []
+_generation = 0
+
+def _sql_money(function):
+    """Wrap a money function for SQL: NULL in or an amount that is not a number gives NULL."""
+    def sql_function(*args):
+        if None in args:
+            return None
+        try:
+            return function(*args)
+        except ValueError:
+            return None
+    return sql_function
+
+def _register_functions(conn):
+    """Make the exact paisa arithmetic of functions.money available to SQL."""
+    conn.create_function('money_to_minor', 1, _sql_money(to_minor), deterministic=True)
+    conn.create_function('money_line_total', 2, _sql_money(line_total), deterministic=True)
 
 def create_connection():
-    """Create a database connection to the SQLite database."""
+    """Create a new database connection to the SQLite database with the tuned pragmas applied.
+
+    Connections run in autocommit mode; use transaction() to group statements.
+    """
     conn = None
     try:
-        conn = sqlite3.connect('invoices.db')
+        conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        _register_functions(conn)
         return conn
     except Error as e:
         print(e)
     return conn
 
+class _ConnectionHolder:
+    """A thread's connection; kept only in the thread's local storage, so it dies with the thread."""
+    __slots__ = ('conn', 'pid', 'generation', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pid = os.getpid()
+        self.generation = _generation
+
+def _release_connection(conn, pid):
+    """Retire the connection of a thread that has exited (or that was replaced)."""
+    # A forked child must leave the parent's connection alone
+    if os.getpid() != pid:
+        return
+    # This runs while the exiting thread's state is torn down, where closing a connection
+    # with Python functions registered on it crashes; the next new connection closes it
+    with _connections_lock:
+        _connections.discard(conn)
+        _retired.append(conn)
+
+def _close_retired():
+    with _connections_lock:
+        retired = _retired[:]
+        _retired.clear()
+    for conn in retired:
+        conn.close()
+
+def get_connection():
+    """Return the calling thread's long-lived connection, opening it on first use.
+
+    The connection is closed once its thread has exited (by the next thread to open one, or
+    close_connections), so thread pool threads that expire and are replaced do not leave
+    connections behind.
+    """
+    holder = getattr(_local, 'holder', None)
+    # A forked worker process must not reuse the parent's connection
+    if holder is None or holder.pid != os.getpid() or holder.generation != _generation:
+        _close_retired()
+        conn = create_connection()
+        if conn is None:
+            return None
+        holder = _local.holder = _ConnectionHolder(conn)
+        weakref.finalize(holder, _release_connection, conn, holder.pid)
+        with _connections_lock:
+            _connections.add(conn)
+    return holder.conn
+
+def close_connections():
+    """Close every connection opened by get_connection in this process."""
+    global _generation
+    with _connections_lock:
+        for conn in _connections:
+            conn.close()
+        _connections.clear()
+        _generation += 1
+    _close_retired()
+
+def set_database_path(path):
+    """Point all helpers at a different database file."""
+    global DB_PATH
+    close_connections()
+    DB_PATH = path
+
+atexit.register(close_connections)
+
+@contextmanager
+def transaction(immediate=False):
+    """Run the block in a transaction on the thread's connection and commit it on success.
+
+    Nested calls join the outer transaction. With immediate=True the write lock is taken up front.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
 def create_table():
-    """Create the invoices table."""
-    conn = create_connection()
-    if conn is not None:
-        try:
-            sql_create_invoices_table = """CREATE TABLE IF NOT EXISTS invoices (
-                                                id INTEGER PRIMARY KEY,
-                                                client_name TEXT NOT NULL,
-                                                client_phone TEXT,
-                                                client_email TEXT,
-                                                bill_to TEXT,
-                                                items TEXT,
-                                                invoice_number TEXT UNIQUE,
-                                                date TEXT,
-                                                total REAL,
-                                                file_path TEXT
-                                            );"""
-            conn.execute(sql_create_invoices_table)
-            conn.commit()
-        except Error as e:
-            print(e)
-    else:
-        print("Error! Cannot create the database connection.")
+    """Create the invoices table and everything derived from it, upgrading an older schema."""
+    try:
+        migrate()
+    except Error as e:
+        print(e)
+
+def _add_column(conn, column, column_type):
+    """Add a column to invoices unless it is already there."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(invoices)")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE invoices ADD COLUMN {column} {column_type}")
+
+def _migration_1_invoices(conn):
+    sql_create_invoices_table = """CREATE TABLE IF NOT EXISTS invoices (
+                                        id INTEGER PRIMARY KEY,
+                                        client_name TEXT NOT NULL,
+                                        client_phone TEXT,
+                                        client_email TEXT,
+                                        bill_to TEXT,
+                                        items TEXT,
+                                        invoice_number TEXT UNIQUE,
+                                        date TEXT,
+                                        total REAL,
+                                        file_path TEXT
+                                    );"""
+    conn.execute(sql_create_invoices_table)
+    # Indexes behind the admin panel's sorting and filtering
+    for sql_create_index in SQL_CREATE_INVOICE_INDEXES:
+        conn.execute(sql_create_index)
+    conn.execute(SQL_CREATE_INVOICE_SEQUENCE_TABLE)
+
+def _migration_2_invoice_items(conn):
+    create_invoice_items_table(conn)
+
+def _migration_3_revenue_summaries(conn):
+    _add_column(conn, 'venue', 'TEXT')
+    # The summary tables are summed from total_minor, which migration 6 adds; migration 7
+    # creates them, and every database upgraded through this step runs that one too
+
+def _migration_4_search_index(conn):
+    create_search_index(conn)
 
-def insert_invoice(client_name, client_phone, client_email, bill_to, items, invoice_number, date, total, file_path):
-    """Insert a new invoice into the invoices table."""
-    conn = create_connection()
-    sql = ''' INSERT INTO invoices(client_name, client_phone, client_email, bill_to, items, invoice_number, date, total, file_path)
-              VALUES(?,?,?,?,?,?,?,?,?) '''
+def _migration_5_content_hash(conn):
+    _add_column(conn, 'content_hash', 'TEXT')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_invoices_content_hash ON invoices(content_hash)")
+
+def _migration_6_total_minor(conn):
+    # Exact invoice totals in paisa; the REAL total column is kept for existing readers
+    _add_column(conn, 'total_minor', 'INTEGER')
+    conn.execute("UPDATE invoices SET total_minor = CAST(round(total * 100) AS INTEGER) "
+                 "WHERE total_minor IS NULL AND total IS NOT NULL")
+
+def _migration_7_exact_line_items(conn):
+    # Line totals in paisa as the renderer computes them, replacing REAL products such as 3.3000000000000003
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(invoice_items)")}
+    for column in ('unit_price_minor', 'total_minor'):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE invoice_items ADD COLUMN {column} INTEGER")
+    conn.execute("UPDATE invoice_items SET unit_price_minor = money_to_minor(unit_price)")
+    conn.execute("UPDATE invoice_items SET total_minor = money_line_total(unit_price_minor, quantity), "
+                 "total = money_line_total(unit_price_minor, quantity) / 100.0")
+    # The summaries summed REAL totals; they are derived data, so rebuild them in paisa.
+    # Databases that did not have them yet get them here (see migration 3)
+    for table in SUMMARY_TABLES:
+        for event in ('insert', 'delete', 'update'):
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_{event}")
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    create_summary_tables(conn)
+
+# Schema changes in order; migration n upgrades a database at user_version n - 1. Every step
+# also copes with the tables it touches already existing, as databases created before
+# versioning were built by create_table in one go. Append new steps, never edit old ones.
+MIGRATIONS = [
+    _migration_1_invoices,
+    _migration_2_invoice_items,
+    _migration_3_revenue_summaries,
+    _migration_4_search_index,
+    _migration_5_content_hash,
+    _migration_6_total_minor,
+    _migration_7_exact_line_items,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def schema_version(conn=None):
+    """Return the schema version recorded in the database."""
+    return (conn or get_connection()).execute("PRAGMA user_version").fetchone()[0]
+
+def migrate():
+    """Bring the database schema up to SCHEMA_VERSION; return the number of migrations run.
+
+    An up-to-date database costs a single PRAGMA read. Pending migrations run in one
+    IMMEDIATE transaction together with the version bump, so concurrent processes upgrade
+    the schema exactly once and a failed upgrade leaves the database untouched.
+    """
+    if schema_version() >= SCHEMA_VERSION:
+        return 0
+    with transaction(immediate=True) as conn:
+        # Another process may have finished the upgrade while this one waited for the lock
+        version = schema_version(conn)
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return max(SCHEMA_VERSION - version, 0)
+
+def create_invoice_items_table(conn):
+    """Create the invoice_items table, backfilling it from the items JSON on first creation."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'invoice_items'").fetchone()
+    conn.execute(SQL_CREATE_INVOICE_ITEMS_TABLE)
+    for sql_create_index in SQL_CREATE_INVOICE_ITEMS_INDEXES:
+        conn.execute(sql_create_index)
+    if not exists:
+        conn.execute(SQL_INSERT_INVOICE_ITEMS.format(where="1"))
+
+def _summary_triggers(table, keys, expressions):
+    """Return the CREATE TRIGGER statements that keep one summary table in step with invoices."""
+    key_list = ', '.join(keys)
+    new_keys = ', '.join(expression.format(row='NEW') for expression in expressions)
+    old_match = ' AND '.join(f"{key} = {expression.format(row='OLD')}" for key, expression in zip(keys, expressions))
+    add_new = f"""INSERT INTO {table}({key_list}, invoice_count, revenue_minor) VALUES({new_keys}, 1, {SQL_ROW_TOTAL_MINOR.format(row='NEW')})
+                  ON CONFLICT({key_list}) DO UPDATE SET invoice_count = invoice_count + 1,
+                                                        revenue_minor = revenue_minor + excluded.revenue_minor;"""
+    remove_old = f"""UPDATE {table} SET invoice_count = invoice_count - 1,
+                                        revenue_minor = revenue_minor - {SQL_ROW_TOTAL_MINOR.format(row='OLD')}
+                     WHERE {old_match};
+                     DELETE FROM {table} WHERE {old_match} AND invoice_count = 0;"""
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON invoices BEGIN {add_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON invoices BEGIN {remove_old} END",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF client_name, date, total, total_minor, venue ON invoices
+            BEGIN {remove_old} {add_new} END""",
+    )
+
+def create_summary_tables(conn):
+    """Create the revenue summary tables and their triggers, filling new tables from invoices.
+
+    Revenue is summed in integer paisa (revenue_minor).
+    """
+    for table, (keys, expressions) in SUMMARY_TABLES.items():
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        key_columns = ', '.join(f"{key} TEXT NOT NULL" for key in keys)
+        conn.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                             {key_columns},
+                             invoice_count INTEGER NOT NULL,
+                             revenue_minor INTEGER NOT NULL,
+                             PRIMARY KEY ({', '.join(keys)})
+                         ) WITHOUT ROWID""")
+        if not exists:
+            grouped = ', '.join(expression.format(row='invoices') for expression in expressions)
+            conn.execute(f"INSERT INTO {table} SELECT {grouped}, COUNT(*), SUM({SQL_ROW_TOTAL_MINOR.format(row='invoices')}) "
+                         f"FROM invoices GROUP BY {grouped}")
+        for sql_create_trigger in _summary_triggers(table, keys, expressions):
+            conn.execute(sql_create_trigger)
+
+def create_search_index(conn):
+    """Create the invoices_fts full-text index and its triggers, filling a new index from invoices."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'invoices_fts'").fetchone()
+    conn.execute(SQL_CREATE_INVOICES_FTS_TABLE)
+    if not exists:
+        conn.execute(f"""INSERT INTO invoices_fts(rowid, client_name, client_email, bill_to, items)
+                         SELECT id, client_name, client_email, bill_to, {SQL_FTS_ITEMS_TEXT.format(row='invoices')}
+                         FROM invoices""")
+    for sql_create_trigger in SQL_CREATE_INVOICES_FTS_TRIGGERS:
+        conn.execute(sql_create_trigger)
+
+def _normalize_row(row):
+    """Serialize items given as objects and fill in total_minor (the last column) from total."""
+    if not isinstance(row[ITEMS_INDEX], (str, type(None))):
+        row = row[:ITEMS_INDEX] + (items_to_json(row[ITEMS_INDEX]),) + row[ITEMS_INDEX + 1:]
+    if row[-1] is None and row[TOTAL_INDEX] is not None:
+        return row[:-1] + (to_minor(row[TOTAL_INDEX]),)
+    return row
+
+def insert_invoice(client_name, client_phone, client_email, bill_to, items, invoice_number, date, total, file_path,
+                   venue=None, content_hash=None, total_minor=None):
+    """Insert a new invoice into the invoices table.
+
+    items is the items JSON, or a list of item dicts or LineItems or a LineItemBatch to
+    serialize. total_minor is the exact total in paisa; without it, it is derived from total.
+    """
+    sql = ''' INSERT INTO invoices(client_name, client_phone, client_email, bill_to, items, invoice_number, date, total, file_path, venue,
+                                  content_hash, total_minor)
+              VALUES(?,?,?,?,?,?,?,?,?,?,?,?) '''
     try:
-        cur = conn.cursor()
-        cur.execute(sql, (client_name, client_phone, client_email, bill_to, items, invoice_number, date, total, file_path))
-        conn.commit()
+        with transaction() as conn:
+            cur = conn.execute(sql, _normalize_row((client_name, client_phone, client_email, bill_to, items, invoice_number, date,
+                                                       total, file_path, venue, content_hash, total_minor)))
+            conn.execute(SQL_INSERT_INVOICE_ITEMS.format(where="i.id = ?"), (cur.lastrowid,))
         return cur.lastrowid
     except sqlite3.IntegrityError as e:
         print(f"Error: {e}")
         return None
 
+def _seed_sequence(conn, prefix):
+    """Return the number after the highest existing '<prefix><digits>' invoice number."""
+    sql = """SELECT MAX(CAST(substr(invoice_number, ?) AS INTEGER)) FROM invoices
+             WHERE invoice_number >= ? AND invoice_number < ? AND substr(invoice_number, ?) NOT GLOB '*[^0-9]*'"""
+    start = len(prefix) + 1
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else '\uffff'
+    highest = conn.execute(sql, (start, prefix, upper, start)).fetchone()[0]
+    return (highest or 0) + 1
+
+def reserve_invoice_numbers(prefix, count):
+    """Reserve count consecutive sequence values for prefix; return the first one.
+
+    Runs in an IMMEDIATE transaction, so concurrent threads and processes on the same
+    database file each get a distinct range. The sequence starts after the highest invoice
+    number already stored with the prefix.
+    """
+    with transaction(immediate=True) as conn:
+        row = conn.execute("SELECT next_value FROM invoice_sequence WHERE prefix = ?", (prefix,)).fetchone()
+        first = row[0] if row else _seed_sequence(conn, prefix)
+        conn.execute("INSERT INTO invoice_sequence(prefix, next_value) VALUES(?, ?) "
+                     "ON CONFLICT(prefix) DO UPDATE SET next_value = excluded.next_value",
+                     (prefix, first + count))
+    return first
+
+def release_invoice_numbers(prefix, first, end):
+    """Hand back the unused range [first, end) if nothing was reserved after it.
+
+    Returns True when the sequence was rewound, False when the numbers stay a gap.
+    """
+    if first >= end:
+        return False
+    with transaction(immediate=True) as conn:
+        cur = conn.execute("UPDATE invoice_sequence SET next_value = ? WHERE prefix = ? AND next_value = ?",
+                           (first, prefix, end))
+    return cur.rowcount == 1
+
+class InvoiceNumberAllocator:
+    """Hands out monotonic invoice numbers such as INV000042 from the invoice_sequence table.
+
+    Numbers are reserved from the database block_size at a time, so a batch takes the write
+    lock once per block instead of once per invoice. Allocation is thread safe; separate
+    processes stay safe because every block comes from its own IMMEDIATE transaction.
+    Call release() when done to return the unused part of the current block.
+    """
+    def __init__(self, prefix='INV', block_size=1, width=INVOICE_NUMBER_WIDTH):
+        self.prefix = prefix
+        self.block_size = block_size
+        self.width = width
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        """Return the next invoice number."""
+        with self._lock:
+            if self._next >= self._end:
+                self._next = reserve_invoice_numbers(self.prefix, self.block_size)
+                self._end = self._next + self.block_size
+            value = self._next
+            self._next += 1
+        return f"{self.prefix}{value:0{self.width}d}"
+
+    def release(self):
+        """Return the unreserved rest of the current block to the sequence when possible."""
+        with self._lock:
+            released = release_invoice_numbers(self.prefix, self._next, self._end)
+            self._next = self._end = 0
+        return released
+
+def _chunks(iterable, size):
+    """Yield lists of up to size items from an iterable without materializing it."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def insert_invoices_many(rows, on_conflict='fail', chunk_size=500):
+    """Insert invoices from an iterable with executemany, one transaction per chunk.
+
+    Rows are tuples in INVOICE_COLUMNS order (insert_invoice argument order) or dicts keyed by
+    column name; items may be given as objects, as for insert_invoice. Line items are
+    expanded into invoice_items in the same transaction. on_conflict decides what happens
+    to an invoice_number that already exists: 'skip' keeps the existing row, 'replace'
+    overwrites it in place and 'fail' raises sqlite3.IntegrityError, rolling back the
+    current chunk. Any other constraint violation raises IntegrityError under every policy.
+    Wrap the call in transaction() to make the whole import atomic.
+
+    Returns a dict with the number of rows 'inserted', 'replaced' and 'skipped'.
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"on_conflict must be one of {CONFLICT_POLICIES}, not {on_conflict!r}")
+    columns = ', '.join(INVOICE_COLUMNS)
+    placeholders = ','.join('?' * len(INVOICE_COLUMNS))
+    if on_conflict == 'skip':
+        # Unlike INSERT OR IGNORE, only a duplicate invoice_number is skipped; NOT NULL and
+        # other constraint violations still raise
+        sql = f"INSERT INTO invoices({columns}) VALUES({placeholders}) ON CONFLICT(invoice_number) DO NOTHING"
+    elif on_conflict == 'replace':
+        # An upsert keeps the row id, unlike INSERT OR REPLACE which deletes and reinserts
+        updates = ', '.join(f"{column} = excluded.{column}" for column in INVOICE_COLUMNS)
+        sql = f"INSERT INTO invoices({columns}) VALUES({placeholders}) ON CONFLICT(invoice_number) DO UPDATE SET {updates}"
+    else:
+        sql = f"INSERT INTO invoices({columns}) VALUES({placeholders})"
+
+    rows = (_normalize_row(tuple(row.get(column) for column in INVOICE_COLUMNS) if isinstance(row, Mapping)
+                              # Tuples written before the later columns were added lack them
+                              else tuple(row) + (None,) * (len(INVOICE_COLUMNS) - len(row)))
+            for row in rows)
+    number_index = INVOICE_COLUMNS.index('invoice_number')
+    counts = {'inserted': 0, 'replaced': 0, 'skipped': 0}
+    for chunk in _chunks(rows, chunk_size):
+        numbers = {row[number_index] for row in chunk}
+        numbers_json = json.dumps(list(numbers))
+        with transaction() as conn:
+            if on_conflict == 'replace':
+                existing = conn.execute("SELECT COUNT(*) FROM invoices WHERE invoice_number IN (SELECT value FROM json_each(?))",
+                                        (numbers_json,)).fetchone()[0]
+                conn.executemany(sql, chunk)
+                # Replaced invoices keep their id; their old line items are expanded again below
+                conn.execute("DELETE FROM invoice_items WHERE invoice_id IN (SELECT id FROM invoices WHERE invoice_number IN "
+                             "(SELECT value FROM json_each(?)))", (numbers_json,))
+                # Repeats within the chunk overwrite the row inserted earlier in the chunk
+                counts['replaced'] += existing + len(chunk) - len(numbers)
+                counts['inserted'] += len(numbers) - existing
+            else:
+                cur = conn.executemany(sql, chunk)
+                counts['inserted'] += cur.rowcount
+                counts['skipped'] += len(chunk) - cur.rowcount
+            conn.execute(SQL_INSERT_INVOICE_ITEMS.format(where="i.invoice_number IN (SELECT value FROM json_each(?))"),
+                         (numbers_json,))
+    return counts
+
 def get_invoice_by_number(invoice_number):
     """Retrieve an invoice from the database by its invoice number."""
-    conn = create_connection()
     sql = "SELECT * FROM invoices WHERE invoice_number = ?"
-    cur = conn.cursor()
-    cur.execute(sql, (invoice_number,))
-    row = cur.fetchone()
-    return row
+    cur = get_connection().execute(sql, (invoice_number,))
+    return cur.fetchone()
+
+def get_invoice_items(invoice_number):
+    """Return the line items of an invoice as (name, description, unit_price, quantity, total) rows."""
+    sql = """SELECT t.name, t.description, t.unit_price, t.quantity, t.total
+             FROM invoice_items t JOIN invoices i ON i.id = t.invoice_id
+             WHERE i.invoice_number = ? ORDER BY t.position"""
+    return get_connection().execute(sql, (invoice_number,)).fetchall()
+
+def query_item_sales(name=None, date_from=None, date_to=None):
+    """Return (name, units sold, revenue, invoice count) per item name, best sellers first.
+
+    Revenue is in rupees, summed exactly from the paisa line totals.
+
+    name restricts the result to one item; date_from and date_to (ISO dates, inclusive)
+    restrict it to invoices dated in that range.
+    """
+    conditions = []
+    params = []
+    if name is not None:
+        conditions.append("t.name = ?")
+        params.append(name)
+    if date_from:
+        conditions.append("i.date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("i.date <= ?")
+        params.append(date_to)
+    sql = """SELECT t.name, SUM(t.quantity), SUM(t.total_minor) / 100.0, COUNT(DISTINCT t.invoice_id)
+             FROM invoice_items t JOIN invoices i ON i.id = t.invoice_id"""
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " GROUP BY t.name ORDER BY SUM(t.quantity) DESC"
+    return get_connection().execute(sql, params).fetchall()
+
+def _escape_like(text):
+    """Escape LIKE wildcards so user input only matches literally."""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def query_invoices(filters=None, sort='id', descending=True, after=None, limit=200, newer_than=None):
+    """Return a page of invoices matching filters, ordered by sort.
+
+    filters may hold 'client_name' (case-insensitive prefix), 'invoice_prefix', 'date_from',
+    'date_to' (ISO dates, inclusive), 'total_min' and 'total_max'; empty values are ignored.
+    after is the (sort value, id) of the last row of the previous page, and newer_than
+    limits the page to invoices with a higher id, i.e. added since that one. Rows are
+    (id, invoice_number, client_name, date, total, file_path). Every condition is a
+    parameterized range on an indexed column, so pages stay cheap as the table grows.
+    """
+    filters = filters or {}
+    expression = SORT_EXPRESSIONS[sort]
+    conditions = []
+    params = []
+    if filters.get('client_name'):
+        conditions.append("client_name LIKE ? ESCAPE '\\'")
+        params.append(_escape_like(filters['client_name']) + '%')
+    if filters.get('invoice_prefix'):
+        prefix = filters['invoice_prefix']
+        conditions.append("invoice_number >= ? AND invoice_number < ?")
+        params += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+    if filters.get('date_from'):
+        conditions.append("date >= ?")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        conditions.append("date <= ?")
+        params.append(filters['date_to'])
+    if filters.get('total_min') is not None:
+        conditions.append("total >= ?")
+        params.append(filters['total_min'])
+    if filters.get('total_max') is not None:
+        conditions.append("total <= ?")
+        params.append(filters['total_max'])
+    if newer_than is not None:
+        conditions.append("id > ?")
+        params.append(newer_than)
+    if after is not None:
+        operator = '<' if descending else '>'
+        if sort == 'id':
+            conditions.append(f"id {operator} ?")
+            params.append(after[1])
+        else:
+            # Written so the leading term is a plain range SQLite can seek the index with
+            conditions.append(f"{expression} {operator}= ? AND ({expression} {operator} ? OR id {operator} ?)")
+            params += [after[0], after[0], after[1]]
+
+    direction = 'DESC' if descending else 'ASC'
+    sql = "SELECT id, invoice_number, client_name, date, total, file_path FROM invoices"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {expression} {direction}"
+    if sort != 'id':
+        sql += f", id {direction}"
+    sql += " LIMIT ?"
+    params.append(limit)
+    return get_connection().execute(sql, params).fetchall()
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    return ' '.join('"' + token.replace('"', '""') + '"*' for token in text.split())
+
+def search_invoices(query, limit=200):
+    """Return up to limit invoices matching every word of query, best match first.
+
+    Words are matched as prefixes against the client name, email, bill-to name and line
+    item names and descriptions. Rows have the query_invoices shape.
+    """
+    match = _fts_query(query)
+    if not match:
+        return []
+    sql = f"""SELECT i.id, i.invoice_number, i.client_name, i.date, i.total, i.file_path
+              FROM invoices_fts JOIN invoices i ON i.id = invoices_fts.rowid
+              WHERE invoices_fts MATCH ?
+              ORDER BY bm25(invoices_fts, {', '.join(map(str, SEARCH_WEIGHTS))})
+              LIMIT ?"""
+    return get_connection().execute(sql, (match, limit)).fetchall()
 
 def update_invoice_file_path(invoice_number, file_path):
     """Update the file_path of an invoice."""
-    conn = create_connection()
     sql = "UPDATE invoices SET file_path = ? WHERE invoice_number = ?"
-    cur = conn.cursor()
-    cur.execute(sql, (file_path, invoice_number))
-    conn.commit()
+    with transaction() as conn:
+        conn.execute(sql, (file_path, invoice_number))
 
 def drop_table():
-    """Drop the invoices table if it exists."""
-    conn = create_connection()
+    """Drop the invoices table and its line items if they exist."""
     try:
         sql_drop_invoices_table = "DROP TABLE IF EXISTS invoices"
-        conn.execute(sql_drop_invoices_table)
-        conn.commit()
+        with transaction() as conn:
+            conn.execute("DROP TABLE IF EXISTS invoice_items")
+            conn.execute("DROP TABLE IF EXISTS invoices_fts")
+            # The summaries are derived from invoices and rebuilt by create_table
+            for table in SUMMARY_TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            # The next create_table builds the schema from scratch
+            conn.execute("PRAGMA user_version = 0")
+            conn.execute(sql_drop_invoices_table)
     except Error as e:
-        print(e)
\ No newline at end of file
+        print(e)
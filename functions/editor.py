@@ -1,103 +1,270 @@
 # editor.py
-from fpdf import FPDF
+from fpdf import FPDF, FPDF_VERSION
 import json
-from .database import insert_invoice, update_invoice_file_path, create_connection
+from collections.abc import Sequence
+from .database import insert_invoice
+from .fonts import register_font, text_width, wrap_text
+from .assets import logo_variant, LOGO_SOURCE
+from .image_cache import image_cache
+from .instrumentation import NULL_INSTRUMENTATION
+from .money import InvoiceTotals, to_minor, from_minor, format_money, line_total
+from .line_items import item_to_dict, items_to_json
+from .output_profiles import get_profile, PROFILES
+from .storage import PdfStore
+from .template import get_template, ITEM_COLUMN_WIDTHS
 
 class RoundedRectPDF(FPDF):
     def __init__(self):
         super().__init__()
         self.font_size = 12  # Set a default font size
+        # Fixed 'D:YYYYMMDDHHMMSS' creation date; None stamps the current time
+        self.creation_date = None
+
+    # fpdf appends the serialized document to one growing string, which is quadratic in the
+    # number of pages; keep the chunks and join them only when the text is read
+    @property
+    def buffer(self):
+        if len(self._buffer_chunks) > 1:
+            self._buffer_chunks = [''.join(self._buffer_chunks)]
+        return self._buffer_chunks[0]
+
+    @buffer.setter
+    def buffer(self, value):
+        self._buffer_chunks = [value]
+        self._buffer_length = len(value)
+
+    def _out(self, s):
+        if self.state == 2:
+            super()._out(s)
+            return
+        if isinstance(s, bytes):
+            s = s.decode('latin1')
+        elif not isinstance(s, str):
+            s = str(s)
+        self._buffer_chunks.append(s + '\n')
+        self._buffer_length += len(s) + 1
+
+    def _newobj(self):
+        self.n += 1
+        self.offsets[self.n] = self._buffer_length
+        self._out(str(self.n) + ' 0 obj')
+
+    def _putinfo(self):
+        if self.creation_date is None:
+            return super()._putinfo()
+        # Same entries as fpdf, but reproducible: identical invoices give identical bytes
+        self._out('/Producer ' + self._textstring('PyFPDF ' + FPDF_VERSION + ' http://pyfpdf.googlecode.com/'))
+        for key in ('title', 'subject', 'author', 'keywords', 'creator'):
+            if hasattr(self, key):
+                self._out(f'/{key.capitalize()} ' + self._textstring(getattr(self, key)))
+        self._out('/CreationDate ' + self._textstring(self.creation_date))
 
     def rounded_rect(self, x, y, w, h, r, style=''):
+        """Draw a rectangle with corners rounded to radius r; style as for rect()."""
         k = self.k
         hp = self.h
-        self._out(f'{x * k:.2f} {hp - y * k:.2f} m')
-        self._arc(x + w - r, y, x + w, y + r, x + w, y)
-        self._arc(x + w, y + h - r, x + w - r, y + h, x + w, y + h)
-        self._arc(x + r, y + h, x, y + h - r, x, y + h)
-        self._arc(x, y + r, x + r, y, x, y)
+        # Bezier control points of a quarter circle lie this fraction of r from its ends
+        arc = 4 / 3 * (2 ** 0.5 - 1)
+        self._out(f'{(x + r) * k:.2f} {(hp - y) * k:.2f} m')
+        # Top edge, then the top-right corner
+        self._out(f'{(x + w - r) * k:.2f} {(hp - y) * k:.2f} l')
+        self._arc(x + w - r + r * arc, y, x + w, y + r - r * arc, x + w, y + r)
+        # Right edge, bottom-right corner
+        self._out(f'{(x + w) * k:.2f} {(hp - (y + h - r)) * k:.2f} l')
+        self._arc(x + w, y + h - r + r * arc, x + w - r + r * arc, y + h, x + w - r, y + h)
+        # Bottom edge, bottom-left corner
+        self._out(f'{(x + r) * k:.2f} {(hp - (y + h)) * k:.2f} l')
+        self._arc(x + r - r * arc, y + h, x, y + h - r + r * arc, x, y + h - r)
+        # Left edge, top-left corner back to the start
+        self._out(f'{x * k:.2f} {(hp - (y + r)) * k:.2f} l')
+        self._arc(x, y + r - r * arc, x + r - r * arc, y, x + r, y)
         if style == 'F':
-            self._out(f'{x * k:.2f} {hp - y * k:.2f} l f')
+            self._out('f')
         elif style == 'FD' or style == 'DF':
-            self._out(f'{x * k:.2f} {hp - y * k:.2f} l B')
+            self._out('b')
         else:
-            self._out(f'{x * k:.2f} {hp - y * k:.2f} l S')
+            self._out('s')
 
     def _arc(self, x1, y1, x2, y2, x3, y3):
+        """Append a cubic Bezier curve through control points (x1, y1), (x2, y2) to (x3, y3), in mm."""
         h = self.h
-        self._out(f'{x1 * self.k:.2f} {h - y1 * self.k:.2f} {x2 * self.k:.2f} {h - y2 * self.k:.2f} {x3 * self.k:.2f} {h - y3 * self.k:.2f} c')
+        self._out(f'{x1 * self.k:.2f} {(h - y1) * self.k:.2f} {x2 * self.k:.2f} {(h - y2) * self.k:.2f} {x3 * self.k:.2f} {(h - y3) * self.k:.2f} c')
     
+    def image(self, name, x=None, y=None, w=0, h=0, type='', link=''):
+        self.register_image(name, w, h, type)
+        super().image(name, x, y, w, h, type, link)
+
+    def register_image(self, name, w=0, h=0, type=''):
+        """Add an image to the document without drawing it."""
+        # Take the parsed image from the process-wide cache instead of decoding the file again
+        if name not in self.images:
+            info = image_cache.get(name, w, h, lambda path: self._parse_image(path, type))
+            info['i'] = len(self.images) + 1
+            self.images[name] = info
+            # Parsing an image with an alpha channel is what normally raises the PDF version
+            if 'smask' in info and self.pdf_version < '1.4':
+                self.pdf_version = '1.4'
+
+    def _parse_image(self, name, type=''):
+        if not type:
+            type = name[name.rfind('.') + 1:]
+        type = type.lower()
+        if type in ('jpg', 'jpeg'):
+            return self._parsejpg(name)
+        if type == 'png':
+            return self._parsepng(name)
+        if type == 'gif':
+            return self._parsegif(name)
+        self.error('Unsupported image type: ' + type)
+
     def get_string_width(self, s):
-        return len(s) * self.font_size / 2.54
+        """Width of s in the current font, from the cached glyph width table."""
+        return text_width(register_font(self.current_font), s) * self.font_size / 1000.0
+
+    def split_lines(self, w, txt):
+        """Return the lines multi_cell would break txt into in a cell of width w, without drawing."""
+        max_width = (w - 2 * self.c_margin) * 1000.0 / self.font_size
+        return wrap_text(register_font(self.current_font), txt, max_width)
         
 class InvoiceGenerator:
-    def __init__(self, company_info, client_info, items, invoice_info, logo_path):
+    """Lays out and renders one invoice.
+
+    items may be a list of item dicts or LineItems, a LineItemBatch, or any iterable of
+    items, including a one-shot generator: rows are laid out
+    as they are read, the items table is paginated with its header repeated on every page,
+    and the total is accumulated in the same pass. Amounts are computed in integer paisa
+    (see functions.money); invoice_info may add a 'discount' in rupees and a 'tax_rate' in
+    percent.
+
+    progress, if given, is called with the percentage of the render done so far. Item rows
+    only report progress when items has a length.
+
+    instrumentation, if given (see functions.instrumentation), receives a span for every
+    stage of the render, store and database work and counts of items, pages and bytes.
+
+    output_profile is an OutputProfile or the name of one in PROFILES (see
+    functions.output_profiles); it sets stream compression, the fonts and the logo
+    resolution. The default, 'archive', embeds the logo at up to 300 dpi, or the logo file
+    itself when fpdf can read it and it is the smaller (see functions.assets).
+    """
+    def __init__(self, company_info, client_info, items, invoice_info, logo_path, progress=None,
+                 instrumentation=None, output_profile=None):
         self.company_info = company_info
         self.client_info = client_info
         self.items = items
         self.invoice_info = invoice_info
         self.logo_path = logo_path
+        self.output_profile = get_profile(output_profile)
+        # The smallest variant of the logo at the profile's resolution (see functions.assets)
+        self.template = get_template(logo_variant(logo_path, self.output_profile.logo_dpi), RoundedRectPDF,
+                                     self.output_profile.fonts)
         self.pdf = RoundedRectPDF()
+        self.pdf.set_compression(self.output_profile.compress)
         self.pdf.set_auto_page_break(auto=True, margin=15)
-        self.create_invoice()
+        # Stamp the invoice date rather than the render time so re-renders are byte-identical
+        date_digits = str(invoice_info.get("date", "")).replace('-', '')
+        if len(date_digits) == 8 and date_digits.isdigit():
+            self.pdf.creation_date = f'D:{date_digits}000000'
+        self.template.prepare(self.pdf)
+        self.progress = progress
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self._last_progress = -1
+        self.pdf_bytes = None
+        # Set by the items pass
+        self.totals = None
+        self.total_minor = None
+        self.total = None
+        self.item_count = 0
+        # JSON of each item read from a one-shot iterator, kept for the database record
+        self._items_json = None
 
     def create_invoice(self):
+        """Lay out every section of the invoice on the PDF."""
+        span = self.instrumentation.span
         self.pdf.add_page()
-        self.add_invoice_title()
-        self.add_header()
-        self.add_items()
-        self.add_total()
-        self.add_additional_notes()
-        
-        invoice_number = self.invoice_info['invoice_number']
-        file_path = f"{invoice_number}.pdf"
-        self.save_pdf(file_path)
-        
-        # Update the database with the file path
-        update_invoice_file_path(invoice_number, file_path)
+        with span('title'):
+            self.add_invoice_title()
+        with span('header'):
+            self.add_header()
+        with span('items'):
+            self.add_items()
+        with span('total'):
+            self.add_total()
+        with span('notes'):
+            self.add_additional_notes()
 
-        # Save invoice details to the database
-        items_json = json.dumps(self.items)
-        insert_invoice(self.client_info["name"], self.client_info["phone"], self.client_info["email"],
-                       self.client_info["bill_to"], items_json, self.invoice_info["invoice_number"],
-                       self.invoice_info["date"], sum(item['unit_price'] * item['quantity'] for item in self.items),
-                       file_path)
+    def render(self, stream=None):
+        """Render the invoice and return the PDF bytes.
 
-    def add_invoice_title(self):
-        title = 'Invoice'
-        title_width = self.pdf.get_string_width(title)
-        x_center = (self.pdf.w - title_width) / 2
-        
-        # Set fill color for the background
-        self.pdf.set_fill_color(0, 0, 0)
-        self.pdf.set_text_color(255, 255, 255)
-        
-        # Draw a full-width rectangle for the background
-        self.pdf.rounded_rect(10, 10, self.pdf.w - 20, 15, 3, 'F')
-        
-        # Print centered title
-        self.pdf.set_xy(0, 5)
-        self.pdf.set_font('Arial', 'B', 16)
-        self.pdf.cell(self.pdf.w, 10, title, 0, 0, 'C', 1)
+        The document is laid out and serialized only once; later calls reuse the bytes.
+        If a binary stream is given the PDF is written to it as well.
+        """
+        instrumentation = self.instrumentation
+        if self.pdf_bytes is None:
+            with instrumentation.profiled():
+                self.report_progress(0)
+                self.create_invoice()
+                self.report_progress(85)
+                with instrumentation.span('serialize'):
+                    # fpdf builds the document as a latin-1 string
+                    self.pdf_bytes = self.pdf.output(dest='S').encode('latin-1')
+                self.report_progress(100)
+            instrumentation.count('invoices')
+            instrumentation.count('line_items', self.item_count)
+            instrumentation.count('pages', self.pdf.page)
+            instrumentation.count('bytes_rendered', len(self.pdf_bytes))
+        if stream is not None:
+            with instrumentation.span('write'):
+                stream.write(self.pdf_bytes)
+            instrumentation.count('bytes_written', len(self.pdf_bytes))
+        return self.pdf_bytes
 
-    # Explanation:
-    # - `title_width` calculates the width of the title string.
-    # - `x_center` calculates the horizontal position to center the title within the PDF page width (`self.pdf.w`).
-    # - `set_fill_color` sets the background color to black.
-    # - `set_text_color` sets the text color to white.
-    # - `rounded_rect` draws a rounded rectangle with a full width (self.pdf.w - 20) and fixed height (15) at coordinates (10, 10).
-    # - `set_xy` sets the position at (0, 12) to start printing the title, aligning it vertically centered within the rectangle.
-    # - `cell` prints the title text (`title`) with center alignment ('C') and applies the background fill (1).
+    def store(self, store=None):
+        """Save the rendered PDF in the content-addressed store; return (digest, path)."""
+        pdf_bytes = self.render()
+        with self.instrumentation.span('store'):
+            return (store or PdfStore()).put(pdf_bytes)
 
+    def persist(self, store=None):
+        """Store the PDF and save the invoice to the database in a single transaction."""
+        record = self.invoice_record(store=store)
+        with self.instrumentation.span('database'):
+            return insert_invoice(*record)
 
+    def invoice_record(self, file_path=None, store=None):
+        """Return the invoices table row for this invoice, in insert_invoice argument order.
+
+        Without a file_path the PDF is put in the store and the row points at the stored copy.
+        """
+        # The total comes from the render pass
+        self.render()
+        if self._items_json is None:
+            items_json = items_to_json(self.items)
+        else:
+            items_json = '[' + ', '.join(self._items_json) + ']'
+        if file_path is None:
+            content_hash, file_path = self.store(store)
+        else:
+            content_hash = None
+        return (self.client_info["name"], self.client_info["phone"], self.client_info["email"],
+                self.client_info["bill_to"], items_json, self.invoice_info["invoice_number"],
+                self.invoice_info["date"], self.total, file_path, self.company_info.get("address"), content_hash,
+                self.total_minor)
+
+    def report_progress(self, percent):
+        if self.progress is not None and percent != self._last_progress:
+            self._last_progress = percent
+            self.progress(percent)
+
+    def add_invoice_title(self):
+        self.template.draw(self.pdf, 'title')
 
     def add_header(self):
+        # Logo and the 'Bill To:' label come from the template
+        self.template.draw(self.pdf, 'header')
         self.pdf.set_text_color(0, 0, 0)
         self.pdf.set_font('Arial', '', 12)
-        
-        # Logo on the left below the invoice title
-        self.pdf.image(self.logo_path, x=15, y=25, w=50)
-        
+
         # Invoice number, venue, and date in column format on the right
         self.pdf.set_xy(130, 25)
         self.pdf.cell(0, 10, f'Invoice Number: {self.invoice_info["invoice_number"]}', 0, 1)
@@ -107,10 +274,8 @@ class InvoiceGenerator:
         self.pdf.cell(0, 10, f'Date: {self.invoice_info["date"]}', 0, 1)
         self.pdf.ln(10)
 
-        # Client info on the right side below invoice details
-        self.pdf.set_xy(15, 80)
-        self.pdf.set_font('Arial', '', 12)
-        self.pdf.cell(0, 10, 'Bill To:', 0, 1)
+        # Client info below the 'Bill To:' label
+        self.pdf.set_y(90)
         # self.pdf.cell(0, 10, f'Name: {self.client_info["bill_to"]}', 0, 1)
         self.pdf.cell(0, 10, f'Client Name: {self.client_info["name"]}', 0, 1)
         self.pdf.cell(0, 10, f'Email: {self.client_info["email"]}', 0, 1)
@@ -118,77 +283,152 @@ class InvoiceGenerator:
         self.pdf.ln(10)
 
     def add_items(self):
-        self.pdf.set_font('Arial', 'B', 12)
-        self.pdf.cell(0, 10, 'Items', 0, 1)
+        # 'Items' heading and the table headers come from the template
+        self.template.draw(self.pdf, 'items_header', y=self.pdf.get_y())
         self.pdf.set_font('Arial', '', 12)
+        col_widths = ITEM_COLUMN_WIDTHS
 
-        # Set up table headers
-        col_widths = [50, 50, 30, 30, 30]
-        headers = ['Item Name', 'Description', 'Unit Price', 'Quantity', 'Total']
-        for i in range(len(headers)):
-            self.pdf.cell(col_widths[i], 10, headers[i], 1, 0, 'L')
-        self.pdf.ln()
+        if not isinstance(self.items, Sequence):
+            self._items_json = []
+        # Rows take the render from 10% to 80% when their number is known
+        expected = len(self.items) if self.progress is not None and isinstance(self.items, Sequence) else 0
+        discount = to_minor(self.invoice_info.get('discount', 0))
+        tax_rate = self.invoice_info.get('tax_rate', 0)
+        totals = None
+        amounts = None
+        if isinstance(self.items, Sequence):
+            # Every line total and the invoice totals in one vectorized pass
+            totals = InvoiceTotals.from_items(self.items, discount, tax_rate)
+            amounts = totals.rows()
+        subtotal = 0
+        page_subtotal = 0
+        page_has_rows = False
+        pages = 1
+        count = 0
 
         # Add items
         for item in self.items:
-            # Calculate total for each item
-            total_item = item['unit_price'] * item['quantity']
-
-            # Measure height required for the description
-            x = self.pdf.get_x()
-            y = self.pdf.get_y()
-            self.pdf.multi_cell(col_widths[1], 10, item['description'], 1)
-            description_height = self.pdf.get_y() - y
+            # Unit price and line total in paisa
+            if amounts is not None:
+                unit_price, total_item = next(amounts)
+            else:
+                unit_price = to_minor(item['unit_price'])
+                total_item = line_total(unit_price, item['quantity'])
+            count += 1
+            if self._items_json is not None:
+                self._items_json.append(json.dumps(item_to_dict(item)))
 
-            # Ensure all cells in the row have the same height
-            row_height = max(10, description_height)
+            # Measure the description once; the row is as tall as its wrapped lines
+            lines = self.pdf.split_lines(col_widths[1], item['description']) or ['']
+            cells = (item['name'], format_money(unit_price), str(item['quantity']), format_money(total_item))
 
-            # Reset Y position for consistent row height
-            self.pdf.set_xy(x, y)
+            # A row taller than the room left above the page subtotal is split between pages:
+            # the lines that fit are drawn, and the rest continue below the next page's header
+            while lines:
+                room = int((self.pdf.page_break_trigger - 10 - self.pdf.get_y()) // 10)
+                if room >= 1:
+                    part, lines = lines[:room], lines[room:]
+                    self.add_row_part(part, cells)
+                    if cells:
+                        page_subtotal += total_item
+                        # Continuation parts leave the other columns blank
+                        cells = None
+                    page_has_rows = True
+                if lines:
+                    # A page whose only content is the table header gets no subtotal
+                    if page_has_rows:
+                        self.add_page_subtotal(page_subtotal)
+                    self.pdf.add_page()
+                    self.template.draw(self.pdf, 'table_header', y=self.pdf.get_y())
+                    self.pdf.set_font('Arial', '', 12)
+                    page_subtotal = 0
+                    page_has_rows = False
+                    pages += 1
 
-            # Write cells with adjusted row height
-            self.pdf.cell(col_widths[0], row_height, item['name'], 1)
+            subtotal += total_item
+            if expected:
+                self.report_progress(10 + 70 * count // expected)
 
-            # Description
-            x = self.pdf.get_x()
-            self.pdf.multi_cell(col_widths[1], 10, item['description'], 1)
-            self.pdf.set_xy(x + col_widths[1], y)
+        if pages > 1:
+            self.add_page_subtotal(page_subtotal)
+        self.totals = totals or InvoiceTotals(subtotal, discount, tax_rate)
+        self.total_minor = self.totals.total
+        self.total = from_minor(self.total_minor)
+        self.item_count = count
+        return col_widths
 
-            # Unit Price
-            self.pdf.cell(col_widths[2], row_height, f'PKR {item["unit_price"]:.2f}', 1, 0, align='L')
+    def add_row_part(self, lines, cells):
+        """Draw a row, or the part of one on this page, ten points per description line.
 
-            # Quantity
-            self.pdf.cell(col_widths[3], row_height, str(item['quantity']), 1, align='L')
+        cells holds the name, unit price, quantity and total texts; None leaves them blank.
+        """
+        col_widths = ITEM_COLUMN_WIDTHS
+        name, unit_price, quantity, total = cells or ('', '', '', '')
+        height = 10 * len(lines)
+        x = self.pdf.get_x()
+        y = self.pdf.get_y()
+        self.pdf.cell(col_widths[0], height, name, 1)
 
-            # Total
-            self.pdf.cell(col_widths[4], row_height, f'PKR {total_item:.2f}', 1, align='L')
+        # Description: a bordered box of the row height with the lines painted inside it
+        self.pdf.cell(col_widths[1], height, '', 1)
+        for i, line in enumerate(lines):
+            self.pdf.set_xy(x + col_widths[0], y + 10 * i)
+            self.pdf.cell(col_widths[1], 10, line)
+        self.pdf.set_xy(x + col_widths[0] + col_widths[1], y)
 
-            self.pdf.ln(row_height)
+        self.pdf.cell(col_widths[2], height, unit_price, 1, 0, align='L')
+        self.pdf.cell(col_widths[3], height, quantity, 1, align='L')
+        self.pdf.cell(col_widths[4], height, total, 1, align='L')
+        self.pdf.ln(height)
 
-        return col_widths
+    def add_page_subtotal(self, amount):
+        self.pdf.set_font('Arial', 'I', 12)
+        self.pdf.cell(140, 10, 'Page subtotal:', 1)
+        self.pdf.cell(50, 10, format_money(amount), 1)
+        self.pdf.ln(10)
+        self.pdf.set_font('Arial', '', 12)
 
     def add_total(self):
-        total_amount = sum(item['unit_price'] * item['quantity'] for item in self.items)
         self.pdf.ln(10)
+        totals = self.totals
+        # Subtotal, discount and tax rows appear only on invoices that have a discount or tax
+        if totals.discount or totals.tax:
+            self.pdf.set_font("Arial", "", size=12)
+            self.pdf.cell(140, 10, txt="Subtotal:", border=1)
+            self.pdf.cell(50, 10, txt=format_money(totals.subtotal), border=1, ln=1)
+            if totals.discount:
+                self.pdf.cell(140, 10, txt="Discount:", border=1)
+                self.pdf.cell(50, 10, txt=format_money(-totals.discount), border=1, ln=1)
+            if totals.tax:
+                self.pdf.cell(140, 10, txt=f"Tax ({float(totals.tax_rate):g}%):", border=1)
+                self.pdf.cell(50, 10, txt=format_money(totals.tax), border=1, ln=1)
         self.pdf.set_font("Arial", "B", size=12)
         self.pdf.cell(140, 10, txt="Total Amount:", border=1)
-        self.pdf.cell(50, 10, txt=f"PKR {total_amount:.2f}", border=1)
-        self.pdf.ln(55)  # Add some space before drawing the line
-        
-        self.pdf.set_font("Arial", "B", size=17)
-        self.pdf.cell(0, 10, "Additional Notes", align='C', ln=True)
-
-        # Draw a line
-        self.pdf.set_draw_color(0, 0, 0)
-        self.pdf.line(10, self.pdf.get_y(), 200, self.pdf.get_y())
-        self.pdf.ln(10)  # Add some space after the line
+        self.pdf.cell(50, 10, txt=format_money(self.total_minor), border=1)
+        self.pdf.ln(55)  # Add some space before the notes
 
     def add_additional_notes(self):
-        self.pdf.set_font('Arial', '', 12)
-        self.pdf.multi_cell(0, 10, 'Thank you for your business!', 0, 1)
+        # Heading, rule and thank-you text come from the template
+        self.template.draw(self.pdf, 'notes', y=self.pdf.get_y())
 
     def save_pdf(self, filename='invoice.pdf'):
-        self.pdf.output(filename)
+        """Write the PDF to filename; return the number of bytes written."""
+        with open(filename, 'wb') as f:
+            return len(self.render(f))
+
+def compare_profiles(company_info, client_info, items, invoice_info, logo_path, profiles=None):
+    """Render one invoice with each output profile; return {profile name: PDF size in bytes}.
+
+    profiles is a list of OutputProfiles or names, all of PROFILES by default.
+    """
+    if not isinstance(items, Sequence):
+        items = list(items)
+    sizes = {}
+    for profile in profiles or PROFILES:
+        generator = InvoiceGenerator(company_info, client_info, items, invoice_info, logo_path,
+                                     output_profile=profile)
+        sizes[generator.output_profile.name] = len(generator.render())
+    return sizes
 
 if __name__ == '__main__':
     company_info = {
@@ -211,7 +451,10 @@ if __name__ == '__main__':
         "invoice_number": "INV24",
         "date": "2024-06-21"
     }
-    logo_path = "logo_resized.png"  # Path to the resized logo image
+    logo_path = LOGO_SOURCE
 
     invoice_generator = InvoiceGenerator(company_info, client_info, items, invoice_info, logo_path)
     invoice_generator.save_pdf()
+    invoice_generator.persist()
+    for name, size in compare_profiles(company_info, client_info, items, invoice_info, logo_path).items():
+        print(f"{name}: {size} bytes")
@@ -0,0 +1,60 @@
+# export.py
+import os
+import shutil
+import tempfile
+import zipfile
+
+# Read size when streaming a PDF into a ZIP archive
+COPY_CHUNK_SIZE = 1024 * 1024
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled part way through."""
+
+def copy_invoice(file_path, save_path):
+    """Copy a stored PDF to save_path.
+
+    shutil.copyfile hands the copy to the kernel (sendfile on Linux, fcopyfile on macOS)
+    where it can, so the file never passes through Python memory.
+    """
+    shutil.copyfile(file_path, save_path)
+
+def _unique_name(name, used):
+    base, extension = os.path.splitext(name)
+    candidate = name
+    suffix = 1
+    while candidate in used:
+        suffix += 1
+        candidate = f"{base}-{suffix}{extension}"
+    used.add(candidate)
+    return candidate
+
+def export_zip(entries, zip_path, progress=None, is_cancelled=None):
+    """Stream (file_path, archive name) entries into a ZIP file at zip_path.
+
+    Each PDF is copied into the archive a chunk at a time, so memory use does not grow with
+    the number or size of the invoices. PDFs are already compressed and are stored as is.
+    progress(done, total) is called after every file; when is_cancelled() returns True the
+    partial archive is removed and ExportCancelled is raised. Returns the number of files.
+    """
+    entries = list(entries)
+    directory = os.path.dirname(os.path.abspath(zip_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.zip.tmp')
+    os.close(fd)
+    used_names = set()
+    try:
+        with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for done, (file_path, name) in enumerate(entries, 1):
+                if is_cancelled is not None and is_cancelled():
+                    raise ExportCancelled()
+                info = zipfile.ZipInfo.from_file(file_path, _unique_name(name, used_names))
+                info.compress_type = zipfile.ZIP_STORED
+                with open(file_path, 'rb') as source, archive.open(info, 'w') as target:
+                    shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+                if progress is not None:
+                    progress(done, len(entries))
+        # Only a complete archive appears under the requested name
+        os.replace(temp_path, zip_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(entries)
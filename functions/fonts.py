@@ -0,0 +1,89 @@
+# fonts.py
+import os
+from functools import lru_cache
+
+# Glyph width tables by font name, in 1/1000 of the font size
+_width_tables = {}
+
+def register_font(font):
+    """Build the glyph width table for an fpdf font dict once per process; return its name."""
+    name = font['name']
+    if name not in _width_tables:
+        cw = font['cw']
+        if font['type'] == 'TTF':
+            # Unicode fonts store widths in a list indexed by code point
+            missing = font['desc'].get('MissingWidth') or 500
+            _width_tables[name] = (tuple(cw), missing)
+        else:
+            _width_tables[name] = (tuple(cw.get(chr(code), 0) for code in range(256)), 0)
+    return name
+
+# Per-style fpdf font dicts of TrueType files already parsed, by (path, style)
+_ttf_fonts = {}
+
+def add_ttf_fonts(pdf, files):
+    """Make Arial text on a new document use TrueType files, before any font is selected.
+
+    files maps a style ('', 'B', 'I') to a .ttf path; styles without a file use the ''
+    one. The fonts are registered under the Arial family, so the layout code needs no
+    changes, and fpdf embeds each as a subset of the glyphs the document uses. A file is
+    parsed once per process; later documents get a copy of the parsed font.
+    """
+    for style in ('', 'B', 'I'):
+        path = files.get(style) or files['']
+        fontkey = 'helvetica' + style
+        font = _ttf_fonts.get((path, style))
+        if font is None:
+            pdf.add_font('Arial', style, path, uni=True)
+            _ttf_fonts[(path, style)] = dict(pdf.fonts[fontkey])
+            continue
+        pdf.fonts[fontkey] = dict(font, i=len(pdf.fonts) + 1, subset=list(range(32)))
+        pdf.font_files[fontkey] = {'length1': os.stat(path).st_size, 'type': 'TTF', 'ttffile': path}
+        pdf.font_files[path] = {'type': 'TTF'}
+
+@lru_cache(maxsize=8192)
+def text_width(font_name, text):
+    """Width of text in 1/1000 of the font size."""
+    widths, missing = _width_tables[font_name]
+    size = len(widths)
+    return sum(widths[code] if code < size else missing for code in map(ord, text))
+
+@lru_cache(maxsize=4096)
+def wrap_text(font_name, text, max_width):
+    """Split text into lines no wider than max_width (in 1/1000 of the font size).
+
+    Breaks the same way fpdf's multi_cell does: on explicit newlines, after the last space
+    that fits, or inside a word that is wider than the line on its own.
+    """
+    widths, missing = _width_tables[font_name]
+    size = len(widths)
+    text = text.replace('\r', '')
+    if text.endswith('\n'):
+        text = text[:-1]
+    lines = []
+    for paragraph in text.split('\n'):
+        start = 0
+        i = 0
+        sep = -1
+        width = 0
+        while i < len(paragraph):
+            char = paragraph[i]
+            if char == ' ':
+                sep = i
+            code = ord(char)
+            width += widths[code] if code < size else missing
+            if width > max_width:
+                if sep == -1:
+                    if i == start:
+                        i += 1
+                    lines.append(paragraph[start:i])
+                else:
+                    lines.append(paragraph[start:sep])
+                    i = sep + 1
+                sep = -1
+                start = i
+                width = 0
+            else:
+                i += 1
+        lines.append(paragraph[start:])
+    return tuple(lines)
@@ -2,19 +2,60 @@
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QFormLayout, QTableWidget, QTableWidgetItem, QMessageBox,
-    QFileDialog, QHeaderView, QCalendarWidget, QGroupBox
+    QFileDialog, QHeaderView, QCalendarWidget, QGroupBox, QProgressBar
 )
-from PyQt5.QtCore import Qt, QRegExp, QDate
+from PyQt5.QtCore import Qt, QRegExp, QDate, QObject, QRunnable, QThreadPool, pyqtSignal
 from PyQt5.QtGui import QRegExpValidator, QIcon, QPalette, QColor, QFont
 import sys
 import re
 import datetime
 
-from .editor import InvoiceGenerator  # Assuming editor.py is in the same directory
+from .assets import LOGO_SOURCE
+from .database import InvoiceNumberAllocator
+from .money import to_minor, format_money
+from .line_items import LineItemBatch
+
+class RenderSignals(QObject):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+class InvoiceRenderWorker(QRunnable):
+    """Renders, saves and persists one invoice on a thread pool thread."""
+    def __init__(self, company_info, client_info, items, invoice_info, logo_path, save_path):
+        super().__init__()
+        self.company_info = company_info
+        self.client_info = client_info
+        self.items = items
+        self.invoice_info = invoice_info
+        self.logo_path = logo_path
+        self.save_path = save_path
+        self.signals = RenderSignals()
+
+    def run(self):
+        try:
+            # fpdf and the renderer load with the first invoice rather than at startup
+            from .editor import InvoiceGenerator
+            invoice_generator = InvoiceGenerator(self.company_info, self.client_info, self.items, self.invoice_info,
+                                                 self.logo_path, progress=self.signals.progress.emit)
+            invoice_generator.save_pdf(self.save_path)
+            # insert_invoice returns None when the row was rejected, e.g. a duplicate number
+            if invoice_generator.persist() is None:
+                self.signals.error.emit(f'The PDF was saved to {self.save_path}, but invoice '
+                                        f'{self.invoice_info["invoice_number"]} could not be saved to the '
+                                        f'database: the invoice number is already in use.')
+                return
+        except Exception as e:
+            self.signals.error.emit(str(e))
+            return
+        self.signals.finished.emit(self.save_path)
 
 class InvoiceGUI(QWidget):
     def __init__(self):
         super().__init__()
+        # Signals of invoices still rendering in the background
+        self.render_jobs = set()
+        self.invoice_numbers = InvoiceNumberAllocator()
         self.init_ui()
 
     def init_ui(self):
@@ -92,6 +133,16 @@ class InvoiceGUI(QWidget):
         generate_button.clicked.connect(self.generate_invoice)
         main_layout.addWidget(generate_button)
 
+        # Background render status
+        status_layout = QHBoxLayout()
+        self.render_status_label = QLabel('')
+        self.render_progress = QProgressBar()
+        self.render_progress.setRange(0, 100)
+        self.render_progress.setVisible(False)
+        status_layout.addWidget(self.render_status_label)
+        status_layout.addWidget(self.render_progress)
+        main_layout.addLayout(status_layout)
+
         self.setLayout(main_layout)
 
         # Apply custom styles
@@ -198,7 +249,7 @@ class InvoiceGUI(QWidget):
             return
 
         try:
-            unit_price = float(unit_price)
+            unit_price = to_minor(unit_price)
             quantity = int(quantity)
         except ValueError:
             QMessageBox.warning(self, "Invalid Input", "Please enter valid numbers for Unit Price and Quantity.")
@@ -208,7 +259,10 @@ class InvoiceGUI(QWidget):
         self.items_table.insertRow(row_position)
         self.items_table.setItem(row_position, 0, QTableWidgetItem(name))
         self.items_table.setItem(row_position, 1, QTableWidgetItem(description))
-        self.items_table.setItem(row_position, 2, QTableWidgetItem(f"PKR {unit_price:.2f}"))
+        # The exact price in paisa rides along with the displayed text
+        price_item = QTableWidgetItem(format_money(unit_price))
+        price_item.setData(Qt.UserRole, unit_price)
+        self.items_table.setItem(row_position, 2, price_item)
         self.items_table.setItem(row_position, 3, QTableWidgetItem(str(quantity)))
 
         # Clear input fields
@@ -225,15 +279,12 @@ class InvoiceGUI(QWidget):
         bill_to_name = self.bill_to_name_input.text()
         invoice_date = self.invoice_date_calendar.selectedDate().toString(Qt.ISODate)
 
-        items = []
+        items = LineItemBatch()
         for row in range(self.items_table.rowCount()):
-            item = {
-                "name": self.items_table.item(row, 0).text(),
-                "description": self.items_table.item(row, 1).text(),
-                "unit_price": float(self.items_table.item(row, 2).text().replace("PKR ", "")),
-                "quantity": int(self.items_table.item(row, 3).text())
-            }
-            items.append(item)
+            items.append_minor(self.items_table.item(row, 0).text(),
+                               self.items_table.item(row, 1).text(),
+                               self.items_table.item(row, 2).data(Qt.UserRole),
+                               int(self.items_table.item(row, 3).text()))
 
         if not all([venue_address, client_name, client_phone, client_email, bill_to_name, items]):
             QMessageBox.warning(self, "Missing Information", "Please fill in all fields.")
@@ -252,19 +303,41 @@ class InvoiceGUI(QWidget):
             "phone": client_phone
         }
         invoice_info = {
-            "invoice_number": "INV12345",
             "date": invoice_date
         }
-        logo_path = "logo_resized.png"  # Path to the resized logo image
+        logo_path = LOGO_SOURCE
 
-        try:
-            invoice_generator = InvoiceGenerator(company_info, client_info, items, invoice_info, logo_path)
-            save_path, _ = QFileDialog.getSaveFileName(self, "Save Invoice PDF", "invoice.pdf", "PDF Files (*.pdf)")
-            if save_path:
-                invoice_generator.save_pdf(save_path)
-                QMessageBox.information(self, "Invoice Generated", f"Invoice saved successfully at:\n{save_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred while generating the invoice:\n{str(e)}")
+        save_path, _ = QFileDialog.getSaveFileName(self, "Save Invoice PDF", "invoice.pdf", "PDF Files (*.pdf)")
+        if not save_path:
+            return
+        # Taken only once the invoice is really being generated, so cancelling leaves no gap
+        invoice_info["invoice_number"] = self.invoice_numbers.next()
+
+        # Render off the UI thread; the form stays usable for the next invoice
+        worker = InvoiceRenderWorker(company_info, client_info, items, invoice_info, logo_path, save_path)
+        signals = worker.signals
+        signals.progress.connect(self.render_progress.setValue)
+        signals.finished.connect(lambda path: self.render_finished(signals, path))
+        signals.error.connect(lambda message: self.render_failed(signals, message))
+        self.render_jobs.add(signals)
+        self.update_render_status()
+        self.render_progress.setValue(0)
+        QThreadPool.globalInstance().start(worker)
+
+    def update_render_status(self):
+        pending = len(self.render_jobs)
+        self.render_progress.setVisible(pending > 0)
+        self.render_status_label.setText(f'Rendering {pending} invoice(s)...' if pending else '')
+
+    def render_finished(self, signals, save_path):
+        self.render_jobs.discard(signals)
+        self.update_render_status()
+        QMessageBox.information(self, "Invoice Generated", f"Invoice saved successfully at:\n{save_path}")
+
+    def render_failed(self, signals, message):
+        self.render_jobs.discard(signals)
+        self.update_render_status()
+        QMessageBox.critical(self, "Error", f"An error occurred while generating the invoice:\n{message}")
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
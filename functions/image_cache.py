@@ -0,0 +1,59 @@
+# image_cache.py
+import os
+import threading
+from collections import OrderedDict
+
+class ImageCache:
+    """Process-wide LRU cache of images already decoded and compressed by fpdf.
+
+    Entries are keyed by absolute path, modification time and target size, so an edited
+    file is parsed again. The cache is bounded both by entry count and by the total size
+    of the stored image streams; the least recently used entries are evicted first.
+    """
+    def __init__(self, max_entries=32, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, width, height, parse):
+        """Return fpdf image info for path, calling parse(path) only on a cache miss.
+
+        The returned dict is a fresh copy: fpdf numbers it and strips its data while
+        writing a document, which must not touch the cached entry.
+        """
+        key = (os.path.abspath(path), os.stat(path).st_mtime_ns, width, height)
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(info)
+
+        info = parse(path)
+        info.pop('i', None)
+        size = sum(len(info.get(field, b'')) for field in ('data', 'smask', 'pal'))
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = info
+                self._sizes[key] = size
+                self._total_bytes += size
+                while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._total_bytes -= self._sizes.pop(evicted)
+        return dict(info)
+
+    def clear(self):
+        """Drop every cached image."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+image_cache = ImageCache()
+
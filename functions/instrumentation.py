@@ -0,0 +1,88 @@
+# instrumentation.py
+import cProfile
+import time
+from contextlib import contextmanager, nullcontext
+
+class Instrumentation:
+    """Collects stage timings and counters, and optionally a cProfile capture.
+
+    Code under measurement wraps each stage in span(name) and reports quantities with
+    count(name, value). Totals accumulate per name; every event is also passed to the hooks,
+    called as hook(kind, name, value) with kind 'span' (value in seconds) or 'count'.
+    With profile=True, the blocks run under profiled() are recorded in one cProfile.Profile.
+    """
+    enabled = True
+
+    def __init__(self, hooks=(), profile=False):
+        self.spans = {}
+        self.counters = {}
+        self.hooks = list(hooks)
+        self.profiler = cProfile.Profile() if profile else None
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+            for hook in self.hooks:
+                hook('span', name, seconds)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+        for hook in self.hooks:
+            hook('count', name, value)
+
+    def profiled(self):
+        """Context manager running its block under the profiler, if profiling is on."""
+        if self.profiler is None:
+            return nullcontext()
+        return _profiling(self.profiler)
+
+    def dump_profile(self, path):
+        """Write the cProfile capture to path in pstats format."""
+        if self.profiler is not None:
+            self.profiler.dump_stats(path)
+
+    def summary(self):
+        """Return {'spans': {...}, 'counters': {...}}, safe to pickle or serialize as JSON."""
+        return {'spans': dict(self.spans), 'counters': dict(self.counters)}
+
+    def merge(self, summary):
+        """Add the totals of another summary (e.g. from a worker process) to this one."""
+        for name, seconds in summary['spans'].items():
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+        for name, value in summary['counters'].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+@contextmanager
+def _profiling(profiler):
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+class NullInstrumentation:
+    """Instrumentation that records nothing; the default, costing one no-op call per stage."""
+    enabled = False
+    _null_span = nullcontext()
+
+    def span(self, name):
+        return self._null_span
+
+    def count(self, name, value=1):
+        pass
+
+    def profiled(self):
+        return self._null_span
+
+    def merge(self, summary):
+        pass
+
+NULL_INSTRUMENTATION = NullInstrumentation()
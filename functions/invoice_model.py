@@ -0,0 +1,246 @@
+# invoice_model.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, pyqtSignal
+from functions.database import query_invoices, search_invoices
+
+class QuerySignals(QObject):
+    loaded = pyqtSignal(int, list)
+    failed = pyqtSignal(int, str)
+
+class QueryWorker(QRunnable):
+    """Runs one query_invoices (or search_invoices) page on a thread pool thread."""
+    def __init__(self, generation, kwargs, query=query_invoices):
+        super().__init__()
+        self.generation = generation
+        self.kwargs = kwargs
+        self.query = query
+        self.signals = QuerySignals()
+
+    def run(self):
+        try:
+            rows = self.query(**self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.loaded.emit(self.generation, rows)
+
+class InvoiceTableModel(QAbstractTableModel):
+    """Table model over the invoices table that fetches rows a page at a time.
+
+    Rows are loaded with keyset pagination, only when the view scrolls near the end of what
+    is already loaded, and kept as plain tuples. Filtering and sorting happen in SQL, and
+    every query runs on a QThreadPool thread so the event loop never waits on the database.
+
+    With a search text set, the model instead shows the best SEARCH_LIMIT full-text matches
+    in rank order; sorting then reorders those rows in memory.
+
+    refresh() picks up invoices added since the rows were loaded by querying only ids above
+    the highest one seen, and inserts them where the current order puts them.
+    """
+    HEADERS = ['Invoice Number', 'Client Name', 'Date', 'Total', 'File Path']
+    # query_invoices sort key for each column; the file path is not sortable
+    SORT_KEYS = ['invoice_number', 'client_name', 'date', 'total', None]
+    PAGE_SIZE = 200
+    SEARCH_LIMIT = 500
+    # More new invoices than this at once and refresh() reloads instead
+    REFRESH_LIMIT = 1000
+
+    queryFailed = pyqtSignal(str)
+    # Emitted with the number of new rows after every page, including an empty one
+    pageLoaded = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._exhausted = False
+        self._loading = False
+        self._refreshing = False
+        # Ids of the loaded rows and the highest of them, for refresh()
+        self._ids = set()
+        self._last_id = None
+        # Bumped on every reset so pages of an outdated query are dropped
+        self._generation = 0
+        self._filters = {}
+        self._sort = 'id'
+        self._descending = True
+        self._search = ''
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        # Column 0 of a stored row is the invoice id
+        return str(self._rows[index.row()][index.column() + 1])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        if self._search:
+            self._start_query({'query': self._search, 'limit': self.SEARCH_LIMIT}, search_invoices)
+            return
+        after = None
+        if self._rows:
+            last = self._rows[-1]
+            sort_value = last[0] if self._sort == 'id' else last[self.SORT_KEYS.index(self._sort) + 1]
+            after = (sort_value, last[0])
+        self._start_query({
+            'filters': self._filters,
+            'sort': self._sort,
+            'descending': self._descending,
+            'after': after,
+            'limit': self.PAGE_SIZE,
+        })
+
+    def _start_query(self, kwargs, query=query_invoices):
+        self._loading = True
+        worker = QueryWorker(self._generation, kwargs, query)
+        worker.signals.loaded.connect(self._on_loaded)
+        worker.signals.failed.connect(self._on_failed)
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_loaded(self, generation, rows):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if self._search:
+            # Search results come in one ranked batch
+            self._exhausted = True
+            if self._sort != 'id':
+                column = self.SORT_KEYS.index(self._sort) + 1
+                rows.sort(key=lambda row: (row[column] is None, row[column]), reverse=self._descending)
+        elif len(rows) < self.PAGE_SIZE:
+            self._exhausted = True
+        # A row added after a refresh can come round again on a later page
+        rows = [row for row in rows if row[0] not in self._ids]
+        if rows:
+            self._remember(rows)
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+        self.pageLoaded.emit(len(rows))
+
+    def _remember(self, rows):
+        self._ids.update(row[0] for row in rows)
+        newest = max(row[0] for row in rows)
+        if self._last_id is None or newest > self._last_id:
+            self._last_id = newest
+
+    def _on_failed(self, generation, message):
+        if generation != self._generation:
+            return
+        self._loading = False
+        self._exhausted = True
+        self.queryFailed.emit(message)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        sort_key = self.SORT_KEYS[column] if 0 <= column < len(self.SORT_KEYS) else 'id'
+        if sort_key is None:
+            return
+        self._sort = sort_key
+        self._descending = order == Qt.DescendingOrder or column < 0
+        self.reload()
+
+    def set_filters(self, filters):
+        """Show only invoices matching filters (see query_invoices)."""
+        self._filters = dict(filters)
+        self.reload()
+
+    def set_search(self, text):
+        """Show the full-text matches for text instead of the filtered list; empty text goes back."""
+        self._search = text.strip()
+        self.reload()
+
+    def reload(self):
+        """Drop the loaded rows and fetch the first page again."""
+        self.beginResetModel()
+        self._generation += 1
+        self._rows = []
+        self._ids = set()
+        self._last_id = None
+        self._exhausted = False
+        self._loading = False
+        self._refreshing = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def refresh(self):
+        """Add the invoices created since the last load without reloading the rest.
+
+        Search results are ranked as a whole, so in search mode the search runs again.
+        """
+        if self._search or self._last_id is None:
+            if not self._loading:
+                self.reload()
+            return
+        if self._refreshing:
+            return
+        self._refreshing = True
+        worker = QueryWorker(self._generation, {
+            'filters': self._filters,
+            'descending': False,
+            'newer_than': self._last_id,
+            'limit': self.REFRESH_LIMIT,
+        })
+        worker.signals.loaded.connect(self._on_refreshed)
+        worker.signals.failed.connect(self._on_refresh_failed)
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_refreshed(self, generation, rows):
+        if generation != self._generation:
+            return
+        self._refreshing = False
+        if len(rows) >= self.REFRESH_LIMIT:
+            self.reload()
+            return
+        rows = [row for row in rows if row[0] not in self._ids]
+        if not rows:
+            return
+        self._remember(rows)
+        key = self._sort_key()
+        for row in rows:
+            # Place the row before the first loaded row it sorts ahead of
+            row_key = key(row)
+            position = next((i for i, loaded in enumerate(self._rows)
+                             if (row_key > key(loaded) if self._descending else row_key < key(loaded))),
+                            len(self._rows))
+            if position == len(self._rows) and not self._exhausted:
+                # Past the loaded pages: fetchMore will bring it in its turn
+                self._ids.discard(row[0])
+                continue
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._rows.insert(position, row)
+            self.endInsertRows()
+
+    def _on_refresh_failed(self, generation, message):
+        if generation != self._generation:
+            return
+        self._refreshing = False
+        self.queryFailed.emit(message)
+
+    def _sort_key(self):
+        """Return a key ordering rows like query_invoices orders them: by the sort column, then id."""
+        if self._sort == 'id':
+            return lambda row: (row[0],)
+        column = self.SORT_KEYS.index(self._sort) + 1
+        if self._sort == 'client_name':
+            return lambda row: (row[column].lower(), row[0])
+        return lambda row: (row[column], row[0])
+
+    def file_path(self, row):
+        """Return the stored PDF path of the invoice at row."""
+        return self._rows[row][5]
+
+    def invoice_number(self, row):
+        return self._rows[row][1]
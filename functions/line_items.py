@@ -0,0 +1,127 @@
+# line_items.py
+"""Compact line item representations.
+
+LineItem is a single item with __slots__ instead of a per-item dict. LineItemBatch holds a
+whole invoice's items column by column: names (interned, as a few names repeat across
+thousands of lines), descriptions, unit prices in paisa and quantities, the numbers in
+typed arrays (quantities only while they are whole). Both can be indexed like the item dicts used elsewhere (item['unit_price']),
+and plain dicts keep working wherever items are accepted.
+"""
+import json
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+from .money import to_minor, from_minor, parse_quantity
+
+ITEM_FIELDS = ('name', 'description', 'unit_price', 'quantity')
+
+
+class LineItem:
+    """One line item; unit_price is in rupees like the dict form."""
+    __slots__ = ITEM_FIELDS
+
+    def __init__(self, name, description, unit_price, quantity):
+        self.name = name
+        self.description = description
+        self.unit_price = unit_price
+        self.quantity = quantity
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __eq__(self, other):
+        if not isinstance(other, LineItem):
+            return NotImplemented
+        return all(self[field] == other[field] for field in ITEM_FIELDS)
+
+    def __repr__(self):
+        return f"LineItem({self.name!r}, {self.description!r}, {self.unit_price!r}, {self.quantity!r})"
+
+    def to_dict(self):
+        return {field: self[field] for field in ITEM_FIELDS}
+
+    @classmethod
+    def from_dict(cls, item):
+        return cls(item['name'], item['description'], item['unit_price'], item['quantity'])
+
+
+class LineItemBatch(Sequence):
+    """Columnar line items: parallel lists of names and descriptions and int64 arrays of paisa and quantities.
+
+    A fractional quantity turns the quantities column into a list of ints and floats.
+    """
+    __slots__ = ('names', 'descriptions', 'unit_prices_minor', 'quantities')
+
+    def __init__(self):
+        self.names = []
+        self.descriptions = []
+        self.unit_prices_minor = array('q')
+        self.quantities = array('q')
+
+    def append(self, name, description, unit_price, quantity):
+        """Add an item; unit_price is in rupees."""
+        self.append_minor(name, description, to_minor(unit_price), quantity)
+
+    def append_minor(self, name, description, unit_price_minor, quantity):
+        """Add an item whose unit price is already in paisa."""
+        self.names.append(sys.intern(name))
+        self.descriptions.append(description)
+        self.unit_prices_minor.append(unit_price_minor)
+        quantity = parse_quantity(quantity)
+        if not isinstance(quantity, int):
+            if isinstance(self.quantities, array):
+                self.quantities = self.quantities.tolist()
+            quantity = float(quantity)
+        self.quantities.append(quantity)
+
+    def extend(self, items):
+        """Add items given as dicts or LineItems."""
+        for item in items:
+            self.append(item['name'], item['description'], item['unit_price'], item['quantity'])
+
+    @classmethod
+    def from_items(cls, items):
+        if isinstance(items, LineItemBatch):
+            return items
+        batch = cls()
+        batch.extend(items)
+        return batch
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            batch = LineItemBatch()
+            batch.names = self.names[index]
+            batch.descriptions = self.descriptions[index]
+            batch.unit_prices_minor = self.unit_prices_minor[index]
+            batch.quantities = self.quantities[index]
+            return batch
+        return LineItem(self.names[index], self.descriptions[index],
+                        from_minor(self.unit_prices_minor[index]), self.quantities[index])
+
+    def __iter__(self):
+        for name, description, unit_price, quantity in zip(self.names, self.descriptions,
+                                                           self.unit_prices_minor, self.quantities):
+            yield LineItem(name, description, from_minor(unit_price), quantity)
+
+    def __getstate__(self):
+        return (self.names, self.descriptions, self.unit_prices_minor, self.quantities)
+
+    def __setstate__(self, state):
+        self.names, self.descriptions, self.unit_prices_minor, self.quantities = state
+
+
+def item_to_dict(item):
+    """Return the dict form of a dict or LineItem."""
+    return item if isinstance(item, Mapping) else item.to_dict()
+
+
+def items_to_json(items):
+    """Serialize items (dicts, LineItems or a LineItemBatch) to the JSON stored in invoices.items."""
+    return json.dumps([item_to_dict(item) for item in items])
@@ -0,0 +1,170 @@
+# money.py
+"""Exact money arithmetic in integer paisa.
+
+Amounts enter as rupees (floats, ints or strings), are converted once to integer minor
+units and stay integers through line totals, subtotal, discount, tax and total. Whole
+columns of line items are converted and multiplied as NumPy arrays when NumPy is
+installed, with a pure-Python fallback giving the same results.
+
+Every rounding to the paisa rounds half up, away from zero, on the decimal value as
+written: 0.125 rupees is 13 paisa and '1.005' is 101. Quantities may be fractional
+(2.5 hours); a line total is the exact product rounded the same way.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+
+CURRENCY = 'PKR'
+MINOR_UNITS = 100
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """Return the numpy module, or None without it; imported on first use to keep startup light."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _decimal(value, what):
+    """Return value (a number or numeric string) as an exact Decimal, read through its text."""
+    try:
+        value = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid {what} {value!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Invalid {what} {value!r}")
+    return value
+
+
+def _round_half_up(value):
+    """Round a Decimal to an integer, halves away from zero."""
+    return int(value.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_minor(amount):
+    """Convert a rupee amount to integer paisa, rounding half up; raises ValueError if it is not a number.
+
+    minor_amounts rounds the same way, so scalar and vectorized paths always agree.
+    """
+    if isinstance(amount, int):
+        return amount * MINOR_UNITS
+    if isinstance(amount, float) and abs(amount) < 1e9:
+        scaled = amount * MINOR_UNITS
+        nearest = round(scaled)
+        # Float error is far below a thousandth of a paisa here; only near-halves need the decimal
+        if abs(abs(scaled - nearest) - 0.5) > 1e-3:
+            return nearest
+    return _round_half_up(_decimal(amount, 'amount') * MINOR_UNITS)
+
+
+def parse_quantity(quantity):
+    """Return a quantity as an int when it is whole, else as an exact Decimal; raises ValueError if it is not a number."""
+    if isinstance(quantity, int):
+        return quantity
+    value = _decimal(quantity, 'quantity')
+    return int(value) if value == value.to_integral_value() else value
+
+
+def line_total(unit_price, quantity):
+    """Return the total of a line in paisa: unit_price (paisa) times quantity, rounded half up."""
+    quantity = parse_quantity(quantity)
+    if isinstance(quantity, int):
+        return unit_price * quantity
+    return _round_half_up(unit_price * quantity)
+
+
+def from_minor(minor):
+    """Convert integer paisa back to rupees as a float."""
+    return minor / MINOR_UNITS
+
+
+def format_money(minor, currency=CURRENCY):
+    """Format integer paisa for display, e.g. 'PKR 1234.50'."""
+    sign = '-' if minor < 0 else ''
+    rupees, paisa = divmod(abs(int(minor)), MINOR_UNITS)
+    return f'{currency} {sign}{rupees}.{paisa:02d}'
+
+
+def parse_money(text, currency=CURRENCY):
+    """Parse a displayed amount such as 'PKR 1,234.50' into integer paisa."""
+    text = text.strip()
+    if text.startswith(currency):
+        text = text[len(currency):]
+    return to_minor(text.replace(',', '').strip())
+
+
+def percent_of(minor, percent):
+    """Return percent % of an amount in paisa, rounded half up to the paisa."""
+    return _round_half_up(minor * _decimal(percent, 'percentage') / 100)
+
+
+def minor_amounts(values):
+    """Convert a sequence of rupee amounts to paisa with to_minor; a NumPy int64 array when NumPy is available."""
+    minor = [to_minor(value) for value in values]
+    numpy = _numpy()
+    if numpy is not None:
+        return numpy.array(minor, dtype=numpy.int64)
+    return minor
+
+
+def line_totals(unit_prices, quantities):
+    """Multiply paisa unit prices by quantities element-wise, as line_total does.
+
+    Whole quantities are multiplied as NumPy int64 arrays when NumPy is available; a column
+    with a fractional quantity is multiplied exactly, line by line, into a list.
+    """
+    # An array('q') column, as LineItemBatch keeps whole quantities in, needs no checking
+    if getattr(quantities, 'typecode', None) != 'q':
+        quantities = [parse_quantity(quantity) for quantity in quantities]
+        if not all(isinstance(quantity, int) for quantity in quantities):
+            return [line_total(int(price), quantity) for price, quantity in zip(unit_prices, quantities)]
+    numpy = _numpy()
+    if numpy is not None:
+        return numpy.asarray(unit_prices, dtype=numpy.int64) * numpy.asarray(quantities, dtype=numpy.int64)
+    return [price * quantity for price, quantity in zip(unit_prices, quantities)]
+
+
+class InvoiceTotals:
+    """Amounts of one invoice in paisa, computed once and shared by the renderer and the database."""
+    __slots__ = ('unit_prices', 'line_totals', 'subtotal', 'discount', 'tax_rate', 'tax', 'total')
+
+    def __init__(self, subtotal, discount=0, tax_rate=0, unit_prices=None, line_totals=None):
+        self.unit_prices = unit_prices
+        self.line_totals = line_totals
+        self.subtotal = subtotal
+        # A discount never takes the invoice below zero
+        self.discount = min(discount, subtotal) if subtotal >= 0 else 0
+        self.tax_rate = tax_rate
+        self.tax = percent_of(subtotal - self.discount, tax_rate)
+        self.total = subtotal - self.discount + self.tax
+
+    def rows(self):
+        """Return an iterator of (unit price, line total) pairs as Python ints."""
+        unit_prices, lines = self.unit_prices, self.line_totals
+        if not isinstance(unit_prices, list):
+            unit_prices = unit_prices.tolist()
+        if not isinstance(lines, list):
+            lines = lines.tolist()
+        return zip(unit_prices, lines)
+
+    @classmethod
+    def from_items(cls, items, discount=0, tax_rate=0):
+        """Compute every line total and the invoice totals of a sequence of items in one pass.
+
+        items are item dicts or LineItems, or a LineItemBatch, whose paisa and quantity
+        arrays are used as they are.
+        """
+        if hasattr(items, 'unit_prices_minor'):
+            numpy = _numpy()
+            if numpy is not None:
+                unit_prices = numpy.asarray(items.unit_prices_minor, dtype=numpy.int64)
+            else:
+                unit_prices = list(items.unit_prices_minor)
+            lines = line_totals(unit_prices, items.quantities)
+        else:
+            unit_prices = minor_amounts([item['unit_price'] for item in items])
+            lines = line_totals(unit_prices, [item['quantity'] for item in items])
+        subtotal = sum(lines) if isinstance(lines, list) else int(lines.sum())
+        return cls(subtotal, discount, tax_rate, unit_prices, lines)
@@ -0,0 +1,51 @@
+# output_profiles.py
+"""Output profiles: how an invoice PDF is compressed and what it embeds.
+
+A profile sets whether page content streams are Flate-compressed, which fonts the
+text uses and how finely the logo is sampled:
+
+- archive: compressed, the logo kept up to print resolution (300 dpi)
+- email: compressed, the logo downsampled to 150 dpi for small attachments
+- draft: uncompressed and a 72 dpi logo, the fastest to produce for previews
+
+fonts is None for the PDF core fonts, which are referenced by name and never embedded,
+or a dict mapping a style ('', 'B', 'I') to a TrueType file. The TTF is embedded as a
+subset holding only the glyphs the invoice uses (see functions.fonts.add_ttf_fonts).
+Use with_fonts() to derive a profile that embeds fonts, e.g. for archives that must
+render the same everywhere.
+"""
+
+class OutputProfile:
+    """Settings for one kind of PDF output; logo_dpi None embeds the logo at full resolution."""
+    __slots__ = ('name', 'compress', 'fonts', 'logo_dpi')
+
+    def __init__(self, name, compress=True, fonts=None, logo_dpi=None):
+        self.name = name
+        self.compress = compress
+        self.fonts = dict(fonts) if fonts else None
+        self.logo_dpi = logo_dpi
+
+    def __repr__(self):
+        return (f"OutputProfile({self.name!r}, compress={self.compress!r}, fonts={self.fonts!r}, "
+                f"logo_dpi={self.logo_dpi!r})")
+
+    def with_fonts(self, fonts, name=None):
+        """Return a copy of this profile that embeds the given TrueType fonts."""
+        return OutputProfile(name or self.name, self.compress, fonts, self.logo_dpi)
+
+PROFILES = {
+    'archive': OutputProfile('archive', compress=True, logo_dpi=300),
+    'email': OutputProfile('email', compress=True, logo_dpi=150),
+    'draft': OutputProfile('draft', compress=False, logo_dpi=72),
+}
+DEFAULT_PROFILE = 'archive'
+
+def get_profile(profile=None):
+    """Return an OutputProfile given one, a profile name or None for the default."""
+    if isinstance(profile, OutputProfile):
+        return profile
+    name = profile or DEFAULT_PROFILE
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown output profile {name!r}; expected one of {', '.join(PROFILES)}") from None
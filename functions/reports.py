@@ -0,0 +1,91 @@
+# reports.py
+"""Revenue reports read from the summary tables kept up to date by database triggers.
+
+Every query reads only the summary rows it returns (plus the rows aggregated for
+revenue_by_month), so reports cost the same however many invoices are stored.
+Revenue is summed in integer paisa and returned in rupees. Months are 'YYYY-MM' strings
+and days ISO dates; range bounds are inclusive. Monthly
+reports accept a day as a bound and use its month; the daily report accepts a month and
+covers all of it.
+"""
+from .database import get_connection
+
+# Revenue column of a summary table, in rupees
+REVENUE = "revenue_minor / 100.0"
+
+
+def _range(column, start, end, conditions, params):
+    if start:
+        conditions.append(f"{column} >= ?")
+        params.append(start)
+    if end:
+        conditions.append(f"{column} <= ?")
+        params.append(end)
+
+
+def _month(bound):
+    """The month of a 'YYYY-MM' or 'YYYY-MM-DD' bound."""
+    return bound and bound[:7]
+
+
+def _last_day(bound):
+    """Upper day bound: a month stands for its last day ('-99' sorts after every day of it)."""
+    return bound and (bound + '-99' if len(bound) == 7 else bound)
+
+
+def _select(sql, conditions, params, order):
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order}"
+    return get_connection().execute(sql, params).fetchall()
+
+
+def revenue_by_client(month_from=None, month_to=None, client_name=None):
+    """Return (client_name, month, invoice_count, revenue) rows, latest month first."""
+    conditions, params = [], []
+    _range("month", _month(month_from), _month(month_to), conditions, params)
+    if client_name:
+        conditions.append("client_name = ?")
+        params.append(client_name)
+    return _select(f"SELECT client_name, month, invoice_count, {REVENUE} FROM revenue_by_client_month",
+                   conditions, params, "month DESC, revenue_minor DESC")
+
+
+def revenue_by_venue(month_from=None, month_to=None, venue=None):
+    """Return (venue, month, invoice_count, revenue) rows, latest month first."""
+    conditions, params = [], []
+    _range("month", _month(month_from), _month(month_to), conditions, params)
+    if venue:
+        conditions.append("venue = ?")
+        params.append(venue)
+    return _select(f"SELECT venue, month, invoice_count, {REVENUE} FROM revenue_by_venue_month",
+                   conditions, params, "month DESC, revenue_minor DESC")
+
+
+def revenue_by_day(date_from=None, date_to=None):
+    """Return (day, invoice_count, revenue) rows, latest day first."""
+    conditions, params = [], []
+    _range("day", date_from, _last_day(date_to), conditions, params)
+    return _select(f"SELECT day, invoice_count, {REVENUE} FROM revenue_by_day", conditions, params, "day DESC")
+
+
+def revenue_by_month(month_from=None, month_to=None):
+    """Return (month, invoice_count, revenue) rows, latest month first, rolled up from the daily summary."""
+    conditions, params = [], []
+    # Bound the day range so the primary key of revenue_by_day is used
+    _range("day", _month(month_from), _last_day(_month(month_to)), conditions, params)
+    sql = "SELECT substr(day, 1, 7) AS month, SUM(invoice_count), SUM(revenue_minor) / 100.0 FROM revenue_by_day"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " GROUP BY month ORDER BY month DESC"
+    return get_connection().execute(sql, params).fetchall()
+
+
+# Reports offered by the admin panel: title -> (column headers, query function).
+# Each function takes (range_from, range_to) as months or days.
+REPORTS = {
+    'Revenue by month': (['Month', 'Invoices', 'Revenue'], revenue_by_month),
+    'Revenue by client and month': (['Client', 'Month', 'Invoices', 'Revenue'], revenue_by_client),
+    'Revenue by venue and month': (['Venue', 'Month', 'Invoices', 'Revenue'], revenue_by_venue),
+    'Revenue by day': (['Day', 'Invoices', 'Revenue'], revenue_by_day),
+}
@@ -0,0 +1,72 @@
+# startup.py
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Set to 1 (or pass --startup-report) to print where launch time goes
+STARTUP_REPORT_ENV = 'INVOICE_STARTUP_REPORT'
+
+class StartupTimer:
+    """Records how long each startup step (mostly imports) takes and when the window first paints.
+
+    Steps are measured from the moment the process reported start; only the first run of a
+    named step is kept, so wrapping a lazy import that may run again is harmless. Steps that
+    finish after the report was printed are reported on their own line as they happen.
+    """
+    def __init__(self, start, enabled=False, stream=None):
+        self.start = start
+        self.enabled = enabled
+        self.stream = stream or sys.stderr
+        self.steps = []
+        self._names = set()
+        self._reported = False
+        self._paint_filter = None
+
+    @classmethod
+    def from_environment(cls, start, argv):
+        enabled = '--startup-report' in argv or os.environ.get(STARTUP_REPORT_ENV, '') not in ('', '0')
+        return cls(start, enabled)
+
+    @contextmanager
+    def measure(self, name):
+        began = time.perf_counter()
+        yield
+        if name in self._names:
+            return
+        self._names.add(name)
+        step = (name, time.perf_counter() - began, time.perf_counter() - self.start)
+        self.steps.append(step)
+        if self.enabled and self._reported:
+            self._write(*step)
+
+    def watch_first_paint(self, widget):
+        """Print the report once widget has painted for the first time."""
+        if not self.enabled:
+            return
+        from PyQt5.QtCore import QObject, QEvent, QTimer
+
+        timer = self
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Paint:
+                    watched.removeEventFilter(self)
+                    timer.steps.append(('first paint', 0.0, time.perf_counter() - timer.start))
+                    # Report once the paint itself has finished
+                    QTimer.singleShot(0, timer.report)
+                return False
+
+        self._paint_filter = FirstPaintFilter()
+        widget.installEventFilter(self._paint_filter)
+
+    def report(self):
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        print(f"  {'Startup timing (ms)':<30} {'step':>8} {'since start':>11}", file=self.stream)
+        for step in self.steps:
+            self._write(*step)
+
+    def _write(self, name, seconds, since_start):
+        print(f'  {name:<30} {seconds * 1000:8.1f} {since_start * 1000:11.1f}', file=self.stream)
@@ -0,0 +1,52 @@
+# storage.py
+import hashlib
+import os
+import tempfile
+
+STORE_ROOT = 'invoice_store'
+
+class PdfStore:
+    """Content-addressed store for rendered PDFs.
+
+    Each document is saved once under its SHA-256 digest, in a two-level sharded layout
+    (root/ab/cd/abcd....pdf) so no directory grows past a few hundred entries. Files are
+    written to a temporary name in the target directory and renamed into place, so readers
+    and concurrent writers never see a partial file; storing bytes that are already present
+    costs only the hash.
+    """
+    def __init__(self, root=STORE_ROOT):
+        self.root = root
+
+    def path_for(self, digest):
+        """Return the file path a digest is stored under."""
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + '.pdf')
+
+    def contains(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def put(self, data):
+        """Store data if it is not stored yet; return (digest, path)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return digest, path
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates the file private to the owner
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return digest, path
+
+    def get(self, digest):
+        """Return the stored bytes for a digest."""
+        with open(self.path_for(digest), 'rb') as f:
+            return f.read()
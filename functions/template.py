@@ -0,0 +1,142 @@
+# template.py
+import os
+import threading
+
+from .fonts import add_ttf_fonts
+
+# Fonts registered on every document, in this order, so the /F<n> names baked into the
+# fragments match the document they are replayed into
+TEMPLATE_FONTS = [('Arial', 'B'), ('Arial', '')]
+
+ITEM_COLUMN_WIDTHS = [50, 50, 30, 30, 30]
+ITEM_HEADERS = ['Item Name', 'Description', 'Unit Price', 'Quantity', 'Total']
+# Width the logo is drawn at, in mm
+LOGO_WIDTH = 50
+
+class InvoiceTemplate:
+    """Static invoice chrome rendered once and replayed into each invoice.
+
+    Each fragment is the PDF content-stream operators of a piece of the page that is the
+    same on every invoice: the title bar, the logo and labels, the items table header (with
+    and without the 'Items' heading) and the additional notes. Fragments are drawn once
+    into a scratch document and captured; draw() copies the operators into a document wrapped in q/Q, optionally shifted down the
+    page, so the document's own graphics state is left untouched.
+
+    fonts, if given, maps styles to TrueType files used in place of Arial (see
+    functions.fonts.add_ttf_fonts). Their glyph subsets are per document, so prepare() adds
+    the characters of the fragments to each document's subsets.
+    """
+    def __init__(self, logo_path, pdf_factory, fonts=None):
+        self.logo_path = logo_path
+        self.fonts = fonts
+        self.fragments = {}
+        # Code points drawn by the fragments, by font key, for TrueType fonts
+        self.glyphs = {}
+        self._build(pdf_factory())
+
+    def prepare(self, pdf):
+        """Register the template's fonts and logo on a new document, before add_page."""
+        if self.fonts:
+            add_ttf_fonts(pdf, self.fonts)
+        for family, style in TEMPLATE_FONTS:
+            pdf.set_font(family, style, 12)
+        for fontkey, glyphs in self.glyphs.items():
+            pdf.fonts[fontkey]['subset'].extend(glyphs)
+        pdf.register_image(self.logo_path)
+
+    def draw(self, pdf, name, y=None):
+        """Replay a fragment. With y, it is moved to start at y and the cursor is placed below it."""
+        operators, origin, height = self.fragments[name]
+        if y is None:
+            pdf._out('q\n' + operators + 'Q')
+            return
+        if y + height > pdf.page_break_trigger and pdf.accept_page_break():
+            pdf.add_page(pdf.cur_orientation)
+            y = pdf.t_margin
+        pdf._out(f'q 1 0 0 1 0 {(origin - y) * pdf.k:.2f} cm\n' + operators + 'Q')
+        pdf.set_y(y + height)
+
+    def _capture(self, pdf, name, draw, y=None):
+        # Force the fragment to select its font itself instead of relying on the current one
+        pdf.font_family = ''
+        if y is not None:
+            pdf.set_y(y)
+        start = len(pdf.pages[pdf.page])
+        draw(pdf)
+        height = pdf.get_y() - y if y is not None else 0
+        self.fragments[name] = (pdf.pages[pdf.page][start:], y, height)
+
+    def _build(self, pdf):
+        self.prepare(pdf)
+        pdf.add_page()
+        self._capture(pdf, 'title', self._draw_title)
+        self._capture(pdf, 'header', self._draw_header)
+        self._capture(pdf, 'items_header', self._draw_items_header, y=pdf.t_margin)
+        self._capture(pdf, 'table_header', self._draw_table_header, y=pdf.t_margin)
+        self._capture(pdf, 'notes', self._draw_notes, y=pdf.t_margin)
+        self.glyphs = {fontkey: sorted(set(font['subset'][32:]))
+                       for fontkey, font in pdf.fonts.items() if font['type'] == 'TTF'}
+
+    # Title:
+    # - `set_fill_color` sets the background color to black.
+    # - `set_text_color` sets the text color to white.
+    # - `rounded_rect` draws a rounded rectangle with a full width (pdf.w - 20) and fixed height (12) at coordinates (10, 10),
+    #   ending above the logo at y=25.
+    # - `set_xy` sets the position at (10, 11) to start printing the title inside the bar.
+    # - `cell` prints the title text with center alignment ('C') and no fill of its own, so the bar keeps its rounded corners.
+    def _draw_title(self, pdf):
+        pdf.set_fill_color(0, 0, 0)
+        pdf.set_text_color(255, 255, 255)
+        pdf.rounded_rect(10, 10, pdf.w - 20, 12, 3, 'F')
+        pdf.set_xy(10, 11)
+        pdf.set_font('Arial', 'B', 16)
+        pdf.cell(pdf.w - 20, 10, 'Invoice', 0, 0, 'C')
+
+    def _draw_header(self, pdf):
+        pdf.set_fill_color(0, 0, 0)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font('Arial', '', 12)
+        # Logo on the left below the invoice title
+        pdf.image(self.logo_path, x=15, y=25, w=LOGO_WIDTH)
+        pdf.set_xy(15, 80)
+        pdf.cell(0, 10, 'Bill To:', 0, 1)
+
+    def _draw_items_header(self, pdf):
+        pdf.set_fill_color(0, 0, 0)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'Items', 0, 1)
+        self._draw_table_header(pdf)
+
+    def _draw_table_header(self, pdf):
+        # Repeated at the top of every continuation page of the items table
+        pdf.set_fill_color(0, 0, 0)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font('Arial', '', 12)
+        for width, header in zip(ITEM_COLUMN_WIDTHS, ITEM_HEADERS):
+            pdf.cell(width, 10, header, 1, 0, 'L')
+        pdf.ln()
+
+    def _draw_notes(self, pdf):
+        pdf.set_fill_color(0, 0, 0)
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font('Arial', 'B', 17)
+        pdf.cell(0, 10, 'Additional Notes', align='C', ln=True)
+        pdf.set_draw_color(0, 0, 0)
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(10)
+        pdf.set_font('Arial', '', 12)
+        pdf.multi_cell(0, 10, 'Thank you for your business!', 0, 1)
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+def get_template(logo_path, pdf_factory, fonts=None):
+    """Return the template for a logo and set of fonts, building it once per process."""
+    key = (os.path.abspath(logo_path), os.stat(logo_path).st_mtime_ns,
+           tuple(sorted(fonts.items())) if fonts else None)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is None:
+            template = _templates[key] = InvoiceTemplate(logo_path, pdf_factory, fonts)
+        return template
@@ -1,14 +1,24 @@
 # main.py
+import time
+STARTUP = time.perf_counter()
+
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QAction, QStyleFactory
-from PyQt5.QtGui import QPalette, QColor
-from functions.gui import InvoiceGUI
-from functions.admin_panel import AdminPanel
-from functions.database import create_table, drop_table, insert_invoice
+from functions.startup import StartupTimer
+
+startup_timer = StartupTimer.from_environment(STARTUP, sys.argv)
+
+with startup_timer.measure('import PyQt5'):
+    from PyQt5.QtWidgets import QApplication, QMainWindow, QAction, QStackedWidget, QStyleFactory
+    from PyQt5.QtGui import QPalette, QColor
+with startup_timer.measure('import functions.database'):
+    from functions.database import migrate
 
 class MainApp(QMainWindow):
+    """Main window; each screen is built the first time it is opened and kept in a QStackedWidget."""
     def __init__(self):
         super().__init__()
+        self.invoice_gui = None
+        self.admin_panel = None
         self.init_ui()
 
     def init_ui(self):
@@ -17,6 +27,9 @@ class MainApp(QMainWindow):
         
         # Apply custom styles
         self.apply_custom_styles()
+
+        self.views = QStackedWidget()
+        self.setCentralWidget(self.views)
         
         main_menu = self.menuBar()
         file_menu = main_menu.addMenu('Admin (Coming Soon)')
@@ -31,13 +44,26 @@ class MainApp(QMainWindow):
 
         self.show_invoice_generator()
 
+    # The screens are imported and built on first use so only the one shown at launch is loaded;
+    # after that switching is just raising the kept widget
     def show_invoice_generator(self):
-        self.invoice_gui = InvoiceGUI()
-        self.setCentralWidget(self.invoice_gui)
+        if self.invoice_gui is None:
+            with startup_timer.measure('import functions.gui'):
+                from functions.gui import InvoiceGUI
+            self.invoice_gui = InvoiceGUI()
+            self.views.addWidget(self.invoice_gui)
+        self.views.setCurrentWidget(self.invoice_gui)
 
     def show_admin_panel(self):
-        self.admin_panel = AdminPanel()
-        self.setCentralWidget(self.admin_panel)
+        if self.admin_panel is None:
+            with startup_timer.measure('import functions.admin_panel'):
+                from functions.admin_panel import AdminPanel
+            self.admin_panel = AdminPanel()
+            self.views.addWidget(self.admin_panel)
+        else:
+            # Invoices generated since the panel was last shown
+            self.admin_panel.refresh()
+        self.views.setCurrentWidget(self.admin_panel)
 
     def apply_custom_styles(self):
         # Set custom palette colors
@@ -91,13 +117,17 @@ class MainApp(QMainWindow):
         """)
 
 if __name__ == '__main__':
-    drop_table()  # Drop existing table to ensure new schema
-    create_table()
-    app = QApplication(sys.argv)
+    # Upgrades the schema when needed; a current database is a single version check
+    with startup_timer.measure('migrate schema'):
+        migrate()
+    with startup_timer.measure('create QApplication'):
+        app = QApplication(sys.argv)
 
     # Apply Fusion style
     app.setStyle('Fusion')
 
-    main_app = MainApp()
+    with startup_timer.measure('build main window'):
+        main_app = MainApp()
+    startup_timer.watch_first_paint(main_app)
     main_app.show()
     sys.exit(app.exec_())
@@ -0,0 +1,23 @@
+# conftest.py
+import pytest
+
+from functions import database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """The database module pointed at a fresh invoices database in a temporary directory."""
+    previous = database.DB_PATH
+    database.set_database_path(str(tmp_path / 'invoices.db'))
+    database.create_table()
+    yield database
+    database.set_database_path(previous)
+
+
+@pytest.fixture
+def logo(tmp_path, monkeypatch):
+    """Path of a small logo; the working directory, and so the asset cache, is the temporary directory."""
+    Image = pytest.importorskip("PIL.Image")
+    monkeypatch.chdir(tmp_path)
+    Image.new("RGB", (60, 40), (0, 0, 0)).save("logo.png")
+    return str(tmp_path / "logo.png")
@@ -0,0 +1,38 @@
+# test_assets.py
+import os
+
+import pytest
+
+from functions.assets import AssetError, AssetPipeline
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_best_variant_is_never_larger_than_an_embeddable_source(tmp_path):
+    # An 8-bit palette PNG; its variants are stored as full RGB and come out larger
+    source = str(tmp_path / "logo.png")
+    image = Image.frombytes("L", (60, 40), bytes(i % 200 for i in os.urandom(60 * 40))).convert("P")
+    image.putpalette([value for i in range(256) for value in (i, 255 - i, i // 2)])
+    image.save(source)
+    pipeline = AssetPipeline(str(tmp_path / "cache"))
+    for dpi in (72, 150, 300, None):
+        best = pipeline.best_variant(source, 50, dpi)
+        assert best == source
+
+
+def test_without_pillow_cached_variants_are_used(tmp_path, monkeypatch):
+    # 16-bit, which fpdf cannot embed as it is
+    source = str(tmp_path / "logo.png")
+    Image.new("I;16", (400, 200), 1000).save(source)
+    pipeline = AssetPipeline(str(tmp_path / "cache"))
+    built = pipeline.variant(source, 295)
+
+    def no_pillow(*args):
+        raise ImportError("No module named 'PIL'")
+
+    monkeypatch.setattr(pipeline, "variants", no_pillow)
+    assert pipeline.best_variant(source, 50, 150) == built
+    os.remove(built)
+    pipeline._best.clear()
+    with pytest.raises(AssetError):
+        pipeline.best_variant(source, 50, 150)
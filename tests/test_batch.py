@@ -0,0 +1,71 @@
+# test_batch.py
+import csv
+import json
+import os
+
+from functions.batch import read_specs, run_batch
+
+CLIENT = {"name": "Client", "phone": "0300", "email": "client@example.com", "bill_to": "Client"}
+CSV_COLUMNS = ['invoice_number', 'date', 'venue', 'client_name', 'client_phone', 'client_email', 'bill_to',
+               'item_name', 'item_description', 'unit_price', 'quantity']
+
+
+def spec(logo, invoice_number=None):
+    invoice_info = {"date": "2024-01-01"}
+    if invoice_number:
+        invoice_info["invoice_number"] = invoice_number
+    return {"client_info": CLIENT, "invoice_info": invoice_info, "logo_path": logo,
+            "items": [{"name": "Tea", "description": "Hot", "unit_price": 1.5, "quantity": 2}]}
+
+
+def run(db, path, tmp_path, **options):
+    lines = []
+    summary = run_batch(read_specs(str(path)), store_root=str(tmp_path / "store"), workers=2, report=lines.append,
+                        **options)
+    return summary, lines
+
+
+def test_jsonl_batch_renders_stores_and_reports_bad_lines(db, logo, tmp_path):
+    path = tmp_path / "specs.jsonl"
+    path.write_text('\n'.join([json.dumps(spec(logo, "A1")), "{not json", json.dumps([1, 2]),
+                               json.dumps(spec(logo))]) + '\n')
+    summary, lines = run(db, path, tmp_path)
+    assert (summary["rendered"], summary["failed"], summary["inserted"]) == (2, 2, 2)
+    assert any(line.startswith("FAILED line 2:") for line in lines)
+    assert any(line.startswith("FAILED line 3:") for line in lines)
+
+    # The spec without a number was given the first one of the sequence
+    stored = db.get_invoice_by_number("INV000001")
+    assert stored is not None
+    file_path, content_hash = stored[9], stored[11]
+    with open(file_path, 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+    assert os.path.basename(file_path) == f"{content_hash}.pdf"
+    assert db.get_invoice_by_number("A1")[12] == 300
+
+
+def test_rerun_skips_invoices_already_in_the_database(db, logo, tmp_path):
+    path = tmp_path / "specs.jsonl"
+    path.write_text(json.dumps(spec(logo, "A1")) + '\n')
+    run(db, path, tmp_path)
+    summary, _ = run(db, path, tmp_path)
+    assert (summary["rendered"], summary["inserted"], summary["skipped"]) == (1, 0, 1)
+
+
+def test_csv_batch_groups_rows_and_reports_bad_invoices(db, logo, tmp_path):
+    path = tmp_path / "specs.csv"
+    rows = [["C1", "2024-01-02", "Hall", "Client", "", "", "", "Tea", "Hot", "1.50", "2"],
+            ["C1", "2024-01-02", "Hall", "Client", "", "", "", "Cake", "Sweet", "10", "0.5"],
+            ["C2", "2024-01-02", "Hall", "Client", "", "", "", "Tea", "Hot", "lots", "1"]]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(rows)
+    # The CSV has no logo column; the default logo is relative to the working directory
+    os.makedirs("images")
+    os.replace(logo, os.path.join("images", "logo.png"))
+    summary, lines = run(db, path, tmp_path)
+    assert (summary["rendered"], summary["failed"], summary["inserted"]) == (1, 1, 1)
+    assert any(line.startswith("FAILED C2:") for line in lines)
+    assert db.get_invoice_by_number("C1")[12] == 800
+    assert [item[0] for item in db.get_invoice_items("C1")] == ["Tea", "Cake"]
@@ -0,0 +1,53 @@
+# test_connections.py
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+# Run in a child process, as a regression shows up as a crash
+THREAD_POOL_SCRIPT = """
+import sys
+from PyQt5.QtCore import QCoreApplication, QRunnable, QThreadPool
+from functions import database
+
+database.set_database_path(sys.argv[1])
+database.create_table()
+app = QCoreApplication([])
+pool = QThreadPool()
+pool.setExpiryTimeout(1)
+
+class Query(QRunnable):
+    def run(self):
+        database.get_connection().execute("SELECT money_to_minor(1.5)").fetchone()
+
+for i in range(500):
+    pool.start(Query())
+    if i % 25 == 0:
+        pool.waitForDone()
+pool.waitForDone()
+print(len(database._connections) + len(database._retired))
+"""
+
+
+def test_connections_of_exited_threads_are_closed(db):
+    def query():
+        db.get_connection().execute("SELECT 1").fetchone()
+
+    for _ in range(20):
+        thread = threading.Thread(target=query)
+        thread.start()
+        thread.join()
+    db.get_connection()
+    # This thread's connection, and at most the one retired since the last was opened
+    assert len(db._connections) + len(db._retired) <= 2
+
+
+def test_expiring_qt_pool_threads_release_connections(tmp_path):
+    pytest.importorskip("PyQt5.QtCore")
+    result = subprocess.run([sys.executable, "-c", THREAD_POOL_SCRIPT, str(tmp_path / "pool.db")],
+                            capture_output=True, text=True, timeout=120,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout.split()[-1]) <= 3
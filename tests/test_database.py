@@ -0,0 +1,75 @@
+# test_database.py
+import json
+import sqlite3
+
+import pytest
+
+ITEMS = json.dumps([{"name": "Tea", "description": "Hot", "unit_price": 1.5, "quantity": 2}])
+
+
+def row(number, total=3.0):
+    """An invoices row in insert_invoice argument order."""
+    return ("Client", "0300", "client@example.com", "Client", ITEMS, number, "2024-01-01", total, f"{number}.pdf")
+
+
+def invoice_count(db):
+    return db.get_connection().execute("SELECT COUNT(*) FROM invoices").fetchone()[0]
+
+
+def item_count(db):
+    return db.get_connection().execute("SELECT COUNT(*) FROM invoice_items").fetchone()[0]
+
+
+def test_insert_many_counts_inserted_rows(db):
+    assert db.insert_invoices_many([row("A1"), row("A2")]) == {'inserted': 2, 'replaced': 0, 'skipped': 0}
+    assert invoice_count(db) == 2
+    assert item_count(db) == 2
+
+
+def test_skip_keeps_existing_rows_and_counts_repeats(db):
+    db.insert_invoices_many([row("A1"), row("A2")])
+    counts = db.insert_invoices_many([row("A2", 99.0), row("A3"), row("A3", 99.0)], on_conflict='skip')
+    assert counts == {'inserted': 1, 'replaced': 0, 'skipped': 2}
+    assert db.get_invoice_by_number("A2")[8] == 3.0
+    assert invoice_count(db) == 3
+
+
+def test_skip_counts_across_chunks(db):
+    db.insert_invoices_many([row("A1")])
+    counts = db.insert_invoices_many([row(f"A{i}") for i in range(5)], on_conflict='skip', chunk_size=2)
+    assert counts == {'inserted': 4, 'replaced': 0, 'skipped': 1}
+
+
+def test_replace_overwrites_in_place_and_counts_repeats(db):
+    db.insert_invoices_many([row("A1"), row("A2")])
+    old_id = db.get_invoice_by_number("A2")[0]
+    counts = db.insert_invoices_many([row("A2", 99.0), row("A4"), row("A4", 7.0)], on_conflict='replace')
+    assert counts == {'inserted': 1, 'replaced': 2, 'skipped': 0}
+    replaced = db.get_invoice_by_number("A2")
+    assert replaced[0] == old_id
+    assert replaced[8] == 99.0
+    assert db.get_invoice_by_number("A4")[8] == 7.0
+    # Replaced invoices get their line items expanded once, not once per write
+    assert item_count(db) == invoice_count(db) == 3
+
+
+def test_fail_raises_and_rolls_back_the_chunk(db):
+    db.insert_invoices_many([row("A1")])
+    with pytest.raises(sqlite3.IntegrityError):
+        db.insert_invoices_many([row("A5"), row("A1")], on_conflict='fail')
+    assert db.get_invoice_by_number("A5") is None
+    assert invoice_count(db) == 1
+
+
+def test_unknown_conflict_policy_is_rejected(db):
+    with pytest.raises(ValueError):
+        db.insert_invoices_many([row("A1")], on_conflict='merge')
+
+
+def test_skip_does_not_hide_other_constraint_violations(db):
+    db.insert_invoices_many([row("A1")])
+    nameless = (None,) + row("A2")[1:]
+    with pytest.raises(sqlite3.IntegrityError):
+        db.insert_invoices_many([row("A3"), row("A1"), nameless], on_conflict='skip')
+    assert db.get_invoice_by_number("A3") is None
+    assert invoice_count(db) == 1
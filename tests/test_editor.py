@@ -0,0 +1,46 @@
+# test_editor.py
+import re
+
+import pytest
+
+from functions.editor import InvoiceGenerator
+
+COMPANY = {"address": "Main Hall"}
+CLIENT = {"name": "Client", "phone": "0300", "email": "client@example.com", "bill_to": "Client"}
+INVOICE = {"invoice_number": "INV000001", "date": "2024-01-01"}
+
+
+def render(items, logo):
+    # Draft output is uncompressed, so the drawn text can be read back
+    generator = InvoiceGenerator(COMPANY, CLIENT, items, INVOICE, logo, output_profile='draft')
+    return generator, generator.render().decode('latin-1')
+
+
+def amounts(pdf_text):
+    return re.findall(r'\((PKR [\d.]+)\) Tj', pdf_text)
+
+
+def test_short_invoice_fits_on_one_page(logo):
+    items = [{"name": "Tea", "description": "Hot", "unit_price": 1.5, "quantity": 2}]
+    generator, text = render(items, logo)
+    assert generator.pdf.page_no() == 1
+    assert 'Page subtotal' not in text
+
+
+@pytest.mark.parametrize("words, pages", [(60, 2), (160, 4), (600, 13)])
+def test_long_description_is_split_across_pages(logo, words, pages):
+    description = ' '.join(f'word{i}' for i in range(words))
+    items = [{"name": "Catering", "description": description, "unit_price": 10, "quantity": 2},
+             {"name": "Tea", "description": "Hot", "unit_price": 1, "quantity": 1}]
+    generator, text = render(items, logo)
+    assert generator.pdf.page_no() == pages
+    # Every description line is drawn exactly once
+    drawn = re.findall(r'\((word[^)]*)\) Tj', text)
+    assert ' '.join(drawn).split() == description.split()
+    # The row's amounts appear once, on its first page; every page of the table has its
+    # header and ends with a subtotal, and the subtotals add up to the total
+    assert amounts(text).count('PKR 10.00') == 1
+    assert text.count('(Item Name) Tj') == text.count('(Page subtotal:) Tj') > 1
+    subtotals = re.findall(r'\(Page subtotal:\) Tj.*?\((PKR [\d.]+)\) Tj', text, re.S)
+    assert sum(float(amount[4:]) for amount in subtotals) == 21.0
+    assert amounts(text)[-1] == 'PKR 21.00'
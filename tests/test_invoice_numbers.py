@@ -0,0 +1,60 @@
+# test_invoice_numbers.py
+import json
+import threading
+
+ITEMS = json.dumps([{"name": "Tea", "description": "Hot", "unit_price": 1.5, "quantity": 2}])
+
+
+def row(number):
+    """An invoices row in insert_invoice argument order."""
+    return ("Client", "0300", "client@example.com", "Client", ITEMS, number, "2024-01-01", 3.0, f"{number}.pdf")
+
+
+def test_reserve_starts_after_highest_stored_number(db):
+    db.insert_invoices_many([row("INV000041"), row("INV00004X"), row("OTHER000900")])
+    assert db.reserve_invoice_numbers("INV", 5) == 42
+    assert db.reserve_invoice_numbers("INV", 5) == 47
+    assert db.reserve_invoice_numbers("NEW", 1) == 1
+
+
+def test_release_rewinds_only_the_latest_range(db):
+    first = db.reserve_invoice_numbers("INV", 5)
+    assert db.release_invoice_numbers("INV", first + 2, first + 5)
+    assert db.reserve_invoice_numbers("INV", 1) == first + 2
+
+    block = db.reserve_invoice_numbers("INV", 5)
+    later = db.reserve_invoice_numbers("INV", 5)
+    # Numbers were reserved after the block, so its rest stays a gap
+    assert not db.release_invoice_numbers("INV", block + 1, block + 5)
+    assert db.reserve_invoice_numbers("INV", 1) == later + 5
+    assert not db.release_invoice_numbers("INV", 3, 3)
+
+
+def test_allocator_hands_out_consecutive_numbers_per_block(db):
+    allocator = db.InvoiceNumberAllocator("INV", block_size=3, width=4)
+    assert [allocator.next() for _ in range(4)] == ["INV0001", "INV0002", "INV0003", "INV0004"]
+    other = db.InvoiceNumberAllocator("INV", block_size=3, width=4)
+    assert other.next() == "INV0007"
+    # The first allocator's block was followed by another reservation, so it cannot rewind
+    assert not allocator.release()
+    assert other.release()
+    assert db.InvoiceNumberAllocator("INV", width=4).next() == "INV0008"
+
+
+def test_allocator_numbers_are_unique_across_threads(db):
+    allocator = db.InvoiceNumberAllocator("T", block_size=5)
+    numbers = []
+    lock = threading.Lock()
+
+    def take():
+        taken = [allocator.next() for _ in range(25)]
+        with lock:
+            numbers.extend(taken)
+
+    threads = [threading.Thread(target=take) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(numbers)) == 100
+    assert sorted(numbers) == [f"T{value:06d}" for value in range(1, 101)]
@@ -0,0 +1,103 @@
+# test_money.py
+import pytest
+
+from functions import money
+from functions.line_items import LineItemBatch
+from functions.money import InvoiceTotals, format_money, line_total, parse_money, percent_of, to_minor
+
+ITEMS = [
+    {"name": "Tea", "description": "", "unit_price": 0.1, "quantity": 3},
+    {"name": "Cake", "description": "", "unit_price": 19.99, "quantity": 7},
+]
+
+
+def test_to_minor_rounds_float_noise_to_the_paisa():
+    assert to_minor(0.1 + 0.2) == 30
+    assert to_minor("19.99") == 1999
+    assert to_minor(19.99 * 3) == 5997
+    assert to_minor(-1.005 * 1000) == -100500
+
+
+def test_to_minor_rounds_the_written_amount_half_up():
+    assert to_minor(0.125) == 13
+    assert to_minor("1.005") == 101
+    assert to_minor(-0.125) == -13
+    assert to_minor("12345678901234567.89") == 1234567890123456789
+    with pytest.raises(ValueError):
+        to_minor("12,50")
+
+
+def test_format_and_parse_round_trip():
+    assert format_money(123450) == "PKR 1234.50"
+    assert format_money(-150) == "PKR -1.50"
+    assert format_money(5) == "PKR 0.05"
+    assert parse_money("PKR 1,234.50") == 123450
+
+
+def test_percent_of_rounds_half_up_away_from_zero():
+    assert percent_of(1005, 10) == 101
+    assert percent_of(1004, 10) == 100
+    assert percent_of(-1005, 10) == -101
+    assert percent_of(10000, 17.5) == 1750
+    assert percent_of(333, 0) == 0
+
+
+def test_totals_apply_discount_before_tax():
+    totals = InvoiceTotals.from_items(ITEMS, discount=100, tax_rate=17)
+    assert list(totals.rows()) == [(10, 30), (1999, 13993)]
+    assert totals.subtotal == 14023
+    assert totals.discount == 100
+    # 17% of 139.23 is 23.6691, rounded to 23.67
+    assert totals.tax == 2367
+    assert totals.total == 14023 - 100 + 2367
+
+
+def test_fractional_quantities_are_not_truncated():
+    assert line_total(1000, 2.5) == 2500
+    assert line_total(333, "1.5") == 500
+    assert line_total(1000, "3") == 3000
+    items = [{"name": "Hours", "description": "", "unit_price": 10, "quantity": 2.5}] + ITEMS
+    totals = InvoiceTotals.from_items(items)
+    assert list(totals.rows())[0] == (1000, 2500)
+    assert totals.subtotal == 2500 + 14023
+    batch = LineItemBatch.from_items(items)
+    assert batch[0]["quantity"] == 2.5
+    assert InvoiceTotals.from_items(batch).subtotal == totals.subtotal
+    with pytest.raises(ValueError):
+        line_total(1000, "two")
+
+
+def test_discount_never_takes_the_total_below_zero():
+    totals = InvoiceTotals(10000, discount=15000, tax_rate=10)
+    assert totals.discount == 10000
+    assert totals.tax == 0
+    assert totals.total == 0
+
+
+FRACTIONAL = ITEMS + [{"name": "Hours", "description": "", "unit_price": "12.34", "quantity": "0.5"}]
+
+
+@pytest.mark.parametrize("items", [ITEMS, LineItemBatch.from_items(ITEMS), FRACTIONAL, LineItemBatch.from_items(FRACTIONAL)],
+                         ids=["dicts", "batch", "fractional dicts", "fractional batch"])
+def test_numpy_and_pure_python_totals_agree(monkeypatch, items):
+    expected = InvoiceTotals.from_items(items, discount=250, tax_rate=12.5)
+    monkeypatch.setattr(money, "_numpy", lambda: None)
+    fallback = InvoiceTotals.from_items(items, discount=250, tax_rate=12.5)
+    assert list(fallback.rows()) == list(expected.rows())
+    assert (fallback.subtotal, fallback.discount, fallback.tax, fallback.total) == \
+        (expected.subtotal, expected.discount, expected.tax, expected.total)
+
+
+def test_database_stores_and_sums_the_same_paisa_line_totals(db):
+    items = [{"name": "Tea", "description": "", "unit_price": 1.1, "quantity": 3},
+             {"name": "Hours", "description": "", "unit_price": 10, "quantity": 2.5}]
+    totals = InvoiceTotals.from_items(items)
+    db.insert_invoice("Client", "", "", "Client", items, "M1", "2024-01-05", money.from_minor(totals.total), "m1.pdf",
+                      total_minor=totals.total)
+    stored = db.get_connection().execute(
+        "SELECT unit_price_minor, total_minor, total FROM invoice_items ORDER BY position").fetchall()
+    assert [(unit_price, line) for unit_price, line, _ in stored] == list(totals.rows())
+    assert [total for _, _, total in stored] == [3.3, 25.0]
+    assert db.query_item_sales("Tea") == [("Tea", 3, 3.3, 1)]
+    revenue = db.get_connection().execute("SELECT revenue_minor FROM revenue_by_day").fetchall()
+    assert revenue == [(totals.total,)]
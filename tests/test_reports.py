@@ -0,0 +1,32 @@
+# test_reports.py
+from functions import reports
+
+
+def add(db, number, client, date, total, venue="Hall"):
+    db.insert_invoice(client, "", "", client, "[]", number, date, total, f"{number}.pdf", venue)
+
+
+def test_summaries_follow_inserts_updates_and_deletes(db):
+    add(db, "R1", "Asha", "2024-01-05", 10.1)
+    add(db, "R2", "Asha", "2024-01-31", 0.2)
+    add(db, "R3", "Bilal", "2024-02-01", 5, venue="Garden")
+    assert reports.revenue_by_month() == [("2024-02", 1, 5.0), ("2024-01", 2, 10.3)]
+    assert reports.revenue_by_client() == [("Bilal", "2024-02", 1, 5.0), ("Asha", "2024-01", 2, 10.3)]
+    assert reports.revenue_by_venue(venue="Garden") == [("Garden", "2024-02", 1, 5.0)]
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE invoices SET date = '2024-02-10', total_minor = 700 WHERE invoice_number = 'R2'")
+        conn.execute("DELETE FROM invoices WHERE invoice_number = 'R3'")
+    assert reports.revenue_by_day() == [("2024-02-10", 1, 7.0), ("2024-01-05", 1, 10.1)]
+    assert reports.revenue_by_client(client_name="Bilal") == []
+
+
+def test_month_bounds_cover_whole_months(db):
+    add(db, "R1", "Asha", "2024-01-31", 1)
+    add(db, "R2", "Asha", "2024-02-29", 2)
+    add(db, "R3", "Asha", "2024-03-01", 4)
+    assert reports.revenue_by_day("2024-01", "2024-02") == [("2024-02-29", 1, 2.0), ("2024-01-31", 1, 1.0)]
+    assert reports.revenue_by_day("2024-02-01", "2024-03-01") == [("2024-03-01", 1, 4.0), ("2024-02-29", 1, 2.0)]
+    # A day as a monthly bound stands for its month
+    assert reports.revenue_by_month("2024-02-15", "2024-03-01") == [("2024-03", 1, 4.0), ("2024-02", 1, 2.0)]
+    assert reports.revenue_by_client("2024-01", "2024-01") == [("Asha", "2024-01", 1, 1.0)]
@@ -0,0 +1,46 @@
+# test_schema.py
+import json
+import sqlite3
+
+from functions import database, reports
+
+ITEMS = [{"name": "Tea", "description": "Hot", "unit_price": 1.1, "quantity": 3},
+         {"name": "Cake", "description": "Sweet", "unit_price": 10, "quantity": 1}]
+
+
+def test_unversioned_database_is_upgraded_and_backfilled(tmp_path):
+    path = str(tmp_path / "old.db")
+    # The invoices table as created before line items and schema versions existed
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE invoices (id INTEGER PRIMARY KEY, client_name TEXT NOT NULL, client_phone TEXT,
+                                           client_email TEXT, bill_to TEXT, items TEXT, invoice_number TEXT UNIQUE,
+                                           date TEXT, total REAL, file_path TEXT)""")
+    conn.execute("INSERT INTO invoices(client_name, items, invoice_number, date, total, file_path) VALUES(?,?,?,?,?,?)",
+                 ("Client", json.dumps(ITEMS), "OLD1", "2024-03-04", 13.3, "old.pdf"))
+    conn.commit()
+    conn.close()
+
+    previous = database.DB_PATH
+    database.set_database_path(path)
+    try:
+        database.create_table()
+        assert database.schema_version() == database.SCHEMA_VERSION
+        assert database.migrate() == 0
+        assert database.get_invoice_items("OLD1") == [("Tea", "Hot", 1.1, 3, 3.3), ("Cake", "Sweet", 10, 1, 10.0)]
+        assert database.get_invoice_by_number("OLD1")[12] == 1330
+        assert reports.revenue_by_month() == [("2024-03", 1, 13.3)]
+        assert [row[1] for row in database.search_invoices("cak")] == ["OLD1"]
+    finally:
+        database.set_database_path(previous)
+
+
+def test_line_items_follow_their_invoice(db):
+    db.insert_invoice("Client", "", "", "Client", ITEMS, "N1", "2024-01-01", 13.3, "n1.pdf")
+    assert [item[0] for item in db.get_invoice_items("N1")] == ["Tea", "Cake"]
+    db.insert_invoices_many([("Client", "", "", "Client", ITEMS[:1], "N1", "2024-01-01", 3.3, "n1.pdf")],
+                            on_conflict='replace')
+    assert [item[0] for item in db.get_invoice_items("N1")] == ["Tea"]
+    assert db.query_item_sales() == [("Tea", 3, 3.3, 1)]
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM invoices WHERE invoice_number = 'N1'")
+    assert db.get_connection().execute("SELECT COUNT(*) FROM invoice_items").fetchone()[0] == 0
@@ -0,0 +1,30 @@
+# test_search.py
+import json
+
+
+def add(db, number, client, email, items):
+    db.insert_invoice(client, "", email, client, json.dumps(items), number, "2024-01-01", 1, f"{number}.pdf")
+
+
+def test_search_matches_word_prefixes_across_fields(db):
+    add(db, "S1", "Zainab Café", "zainab@example.com", [{"name": "Biryani", "description": "Chicken, large tray"}])
+    add(db, "S2", "Omar", "omar@example.com", [{"name": "Tea", "description": "For Zainab's stall"}])
+    numbers = lambda query: [row[1] for row in db.search_invoices(query)]
+    # A hit on the client name ranks above one in an item description
+    assert numbers("zain") == ["S1", "S2"]
+    assert numbers("cafe") == ["S1"]
+    assert numbers("chick tray") == ["S1"]
+    assert numbers("omar@exam") == ["S2"]
+    assert numbers('"') == []
+    assert numbers("   ") == []
+
+
+def test_search_index_follows_updates_and_deletes(db):
+    add(db, "S1", "Zainab", "", [])
+    with db.transaction() as conn:
+        conn.execute("UPDATE invoices SET client_name = 'Yusuf', bill_to = 'Yusuf' WHERE invoice_number = 'S1'")
+    assert db.search_invoices("zainab") == []
+    assert [row[1] for row in db.search_invoices("yusuf")] == ["S1"]
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM invoices")
+    assert db.search_invoices("yusuf") == []
@@ -0,0 +1,31 @@
+# test_storage.py
+import hashlib
+import os
+import stat
+
+from functions.storage import PdfStore
+
+
+def test_put_stores_content_once_under_its_digest(tmp_path):
+    store = PdfStore(str(tmp_path / "store"))
+    data = b"%PDF-1.3 test"
+    digest, path = store.put(data)
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert path == os.path.join(str(tmp_path / "store"), digest[:2], digest[2:4], f"{digest}.pdf")
+    assert store.contains(digest)
+    assert store.get(digest) == data
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+    mtime = os.stat(path).st_mtime_ns
+    assert store.put(data) == (digest, path)
+    assert os.stat(path).st_mtime_ns == mtime
+    # No temporary files are left behind
+    assert os.listdir(os.path.dirname(path)) == [f"{digest}.pdf"]
+
+
+def test_different_content_gets_different_paths(tmp_path):
+    store = PdfStore(str(tmp_path))
+    first = store.put(b"one")
+    second = store.put(b"two")
+    assert first != second
+    assert not store.contains("0" * 64)